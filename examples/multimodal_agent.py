@@ -35,7 +35,7 @@ Example usage with weather MCP:
 import os
 import sys
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 from dotenv import load_dotenv
 
 # Compatibility fixes
@@ -790,14 +790,8 @@ class MultimodalAgent:
             traceback.print_exc()
             return None
 
-    def run(self, user_input: str, image_path: Optional[str] = None) -> str:
-        """
-        Process user input, optionally with an image.
-        
-        Args:
-            user_input: Text input from user
-            image_path: Optional path to image file for multimodal input
-        """
+    def _append_user_turn(self, user_input: str, image_path: Optional[str] = None):
+        """Add the user's message (and image, if it loads) to the chat history."""
         # Handle multimodal input (text + image)
         if image_path and os.path.exists(image_path):
             try:
@@ -818,6 +812,150 @@ class MultimodalAgent:
             if image_path:
                 print(f"[Agent] Warning: Image path provided but file doesn't exist: {image_path}")
             self.history.append({"role": "user", "parts": [user_input]})
+
+    def _handle_function_call(self, fc) -> str:
+        """Execute a function call from the model and return the final response text."""
+        fn = fc.name
+        args = dict(fc.args)
+        
+        # Check if this is a native tool or MCP tool
+        is_native_tool = fn in TOOL_FUNCTIONS
+        
+        if is_native_tool:
+            # Native tool - execute manually
+            # Add defaults
+            if fn == "generate_image" and "style" not in args:
+                args["style"] = "realistic"
+            if fn == "generate_figure" and "format" not in args:
+                args["format"] = "mermaid"
+            if fn == "text_to_speech" and "voice" not in args:
+                args["voice"] = "default"
+            if fn == "web_search" and "num_results" not in args:
+                args["num_results"] = 5
+
+            tool_result = TOOL_FUNCTIONS[fn](**args)
+
+            # Extend history with function call and result
+            self.history.append({"role": "model", "parts": [{"function_call": fc}]})
+            self.history.append({"role": "function", "parts": [{"function_response": {"name": fn, "response": {"result": tool_result}}}]})
+
+            print(f"[Agent] Native tool {fn} executed, result: {tool_result[:100] if tool_result else 'None'}...")
+            print(f"[Agent] Generating final response after tool call...")
+            
+        else:
+            # MCP tool - ADK handles execution automatically
+            # Just add function call to history, ADK will execute it when we call generate_content
+            self.history.append({"role": "model", "parts": [{"function_call": fc}]})
+            print(f"[Agent] MCP tool {fn} detected - ADK will handle execution automatically")
+            print(f"[Agent] Generating response (ADK will execute MCP tool)...")
+        
+        # Retry logic for final response (works for both native and MCP tools)
+        max_retries = 3
+        final_error = None
+        
+        for attempt in range(max_retries):
+            try:
+                final_response = self.model.generate_content(self.history)
+                print(f"[Agent] Final response received, has text: {hasattr(final_response, 'text')}")
+                break
+            except Exception as e:
+                final_error = e
+                error_str = str(e).lower()
+                is_rate_limit = (
+                    "429" in str(e) or
+                    "quota" in error_str or
+                    "rate limit" in error_str or
+                    "exceeded" in error_str
+                )
+                
+                if is_rate_limit and attempt < max_retries - 1:
+                    import re
+                    retry_match = re.search(r'retry.*?(\d+)\s*seconds?', error_str, re.IGNORECASE)
+                    if retry_match:
+                        wait_time = float(retry_match.group(1)) + 2
+                    else:
+                        wait_time = min(5.0 * (3 ** attempt), 30.0)
+                    
+                    print(f"[Agent] Rate limit on final response (attempt {attempt + 1}/{max_retries}). Waiting {wait_time:.1f}s...")
+                    import time
+                    time.sleep(wait_time)
+                    continue
+                else:
+                    raise
+        
+        if final_error:
+            # Return tool result as fallback if final response fails (only for native tools)
+            if is_native_tool:
+                return tool_result if tool_result else f"Error generating final response: {str(final_error)}"
+            else:
+                return f"Error generating final response: {str(final_error)}"
+        
+        try:
+            # Extract final response text
+            # IMPORTANT: Don't access .text directly if response might have function_call parts
+            # This can cause "Could not convert part.function_call to text" error
+            final_text = ""
+            
+            if hasattr(final_response, "candidates") and final_response.candidates:
+                # Extract text from candidates, skipping function_call parts
+                for candidate in final_response.candidates:
+                    if hasattr(candidate, "content") and hasattr(candidate.content, "parts"):
+                        for part in candidate.content.parts:
+                            # Only extract text parts, skip function_call
+                            if hasattr(part, "text") and part.text:
+                                final_text += part.text
+                            elif isinstance(part, str):
+                                final_text += part
+                            # Explicitly skip function_call parts to avoid errors
+                            elif hasattr(part, "function_call"):
+                                print(f"[Agent] Skipping function_call part in final response")
+                                continue
+            
+            # Fallback: try .text property (but catch errors)
+            if not final_text:
+                try:
+                    if hasattr(final_response, "text") and final_response.text:
+                        final_text = final_response.text
+                except Exception as text_error:
+                    print(f"[Agent] Warning: Could not access .text property: {text_error}")
+                    # If .text fails, try string conversion
+                    if not final_text:
+                        final_text = str(final_response)
+            
+            # Last resort: string conversion
+            if not final_text:
+                final_text = str(final_response)
+            
+            if not final_text or not final_text.strip():
+                print("[Agent] Warning: Final response is empty after tool call")
+                # Return the tool result as fallback (only for native tools)
+                if is_native_tool:
+                    final_text = tool_result if tool_result else "I've processed your request. Please check if the camera is started and agent camera control is enabled."
+                else:
+                    final_text = f"I've executed the {fn} tool, but didn't receive a response. Please try again."
+            
+            print(f"[Agent] Returning final response: '{final_text[:100]}...'")
+            self.history.append({"role": "model", "parts": [final_text]})
+            return final_text
+        except Exception as e:
+            print(f"[Agent] Error generating final response: {e}")
+            import traceback
+            traceback.print_exc()
+            # Return tool result as fallback (only for native tools)
+            if is_native_tool:
+                return tool_result if tool_result else f"Error: {str(e)}"
+            else:
+                return f"Error processing MCP tool {fn}: {str(e)}"
+
+    def run(self, user_input: str, image_path: Optional[str] = None) -> str:
+        """
+        Process user input, optionally with an image.
+        
+        Args:
+            user_input: Text input from user
+            image_path: Optional path to image file for multimodal input
+        """
+        self._append_user_turn(user_input, image_path)
         
         print(f"[Agent] Generating response with history length: {len(self.history)}")
         
@@ -905,137 +1043,7 @@ class MultimodalAgent:
         # If we have a function call, handle it (both native and MCP tools)
 
         if fc:
-            fn = fc.name
-            args = dict(fc.args)
-            
-            # Check if this is a native tool or MCP tool
-            is_native_tool = fn in TOOL_FUNCTIONS
-            
-            if is_native_tool:
-                # Native tool - execute manually
-                # Add defaults
-                if fn == "generate_image" and "style" not in args:
-                    args["style"] = "realistic"
-                if fn == "generate_figure" and "format" not in args:
-                    args["format"] = "mermaid"
-                if fn == "text_to_speech" and "voice" not in args:
-                    args["voice"] = "default"
-                if fn == "web_search" and "num_results" not in args:
-                    args["num_results"] = 5
-
-                tool_result = TOOL_FUNCTIONS[fn](**args)
-
-                # Extend history with function call and result
-                self.history.append({"role": "model", "parts": [{"function_call": fc}]})
-                self.history.append({"role": "function", "parts": [{"function_response": {"name": fn, "response": {"result": tool_result}}}]})
-
-                print(f"[Agent] Native tool {fn} executed, result: {tool_result[:100] if tool_result else 'None'}...")
-                print(f"[Agent] Generating final response after tool call...")
-                
-            else:
-                # MCP tool - ADK handles execution automatically
-                # Just add function call to history, ADK will execute it when we call generate_content
-                self.history.append({"role": "model", "parts": [{"function_call": fc}]})
-                print(f"[Agent] MCP tool {fn} detected - ADK will handle execution automatically")
-                print(f"[Agent] Generating response (ADK will execute MCP tool)...")
-            
-            # Retry logic for final response (works for both native and MCP tools)
-            max_retries = 3
-            final_error = None
-            
-            for attempt in range(max_retries):
-                try:
-                    final_response = self.model.generate_content(self.history)
-                    print(f"[Agent] Final response received, has text: {hasattr(final_response, 'text')}")
-                    break
-                except Exception as e:
-                    final_error = e
-                    error_str = str(e).lower()
-                    is_rate_limit = (
-                        "429" in str(e) or
-                        "quota" in error_str or
-                        "rate limit" in error_str or
-                        "exceeded" in error_str
-                    )
-                    
-                    if is_rate_limit and attempt < max_retries - 1:
-                        import re
-                        retry_match = re.search(r'retry.*?(\d+)\s*seconds?', error_str, re.IGNORECASE)
-                        if retry_match:
-                            wait_time = float(retry_match.group(1)) + 2
-                        else:
-                            wait_time = min(5.0 * (3 ** attempt), 30.0)
-                        
-                        print(f"[Agent] Rate limit on final response (attempt {attempt + 1}/{max_retries}). Waiting {wait_time:.1f}s...")
-                        import time
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        raise
-            
-            if final_error:
-                # Return tool result as fallback if final response fails (only for native tools)
-                if is_native_tool:
-                    return tool_result if tool_result else f"Error generating final response: {str(final_error)}"
-                else:
-                    return f"Error generating final response: {str(final_error)}"
-            
-            try:
-                # Extract final response text
-                # IMPORTANT: Don't access .text directly if response might have function_call parts
-                # This can cause "Could not convert part.function_call to text" error
-                final_text = ""
-                
-                if hasattr(final_response, "candidates") and final_response.candidates:
-                    # Extract text from candidates, skipping function_call parts
-                    for candidate in final_response.candidates:
-                        if hasattr(candidate, "content") and hasattr(candidate.content, "parts"):
-                            for part in candidate.content.parts:
-                                # Only extract text parts, skip function_call
-                                if hasattr(part, "text") and part.text:
-                                    final_text += part.text
-                                elif isinstance(part, str):
-                                    final_text += part
-                                # Explicitly skip function_call parts to avoid errors
-                                elif hasattr(part, "function_call"):
-                                    print(f"[Agent] Skipping function_call part in final response")
-                                    continue
-                
-                # Fallback: try .text property (but catch errors)
-                if not final_text:
-                    try:
-                        if hasattr(final_response, "text") and final_response.text:
-                            final_text = final_response.text
-                    except Exception as text_error:
-                        print(f"[Agent] Warning: Could not access .text property: {text_error}")
-                        # If .text fails, try string conversion
-                        if not final_text:
-                            final_text = str(final_response)
-                
-                # Last resort: string conversion
-                if not final_text:
-                    final_text = str(final_response)
-                
-                if not final_text or not final_text.strip():
-                    print("[Agent] Warning: Final response is empty after tool call")
-                    # Return the tool result as fallback (only for native tools)
-                    if is_native_tool:
-                        final_text = tool_result if tool_result else "I've processed your request. Please check if the camera is started and agent camera control is enabled."
-                    else:
-                        final_text = f"I've executed the {fn} tool, but didn't receive a response. Please try again."
-                
-                print(f"[Agent] Returning final response: '{final_text[:100]}...'")
-                self.history.append({"role": "model", "parts": [final_text]})
-                return final_text
-            except Exception as e:
-                print(f"[Agent] Error generating final response: {e}")
-                import traceback
-                traceback.print_exc()
-                # Return tool result as fallback (only for native tools)
-                if is_native_tool:
-                    return tool_result if tool_result else f"Error: {str(e)}"
-                else:
-                    return f"Error processing MCP tool {fn}: {str(e)}"
+            return self._handle_function_call(fc)
 
         # No function call; normal text response
         # IMPORTANT: Don't access .text directly - it might throw error if response has function_call parts
@@ -1090,6 +1098,49 @@ class MultimodalAgent:
         return text
 
 
+    def stream(self, user_input: str, image_path: Optional[str] = None) -> Iterator[str]:
+        """
+        Like run(), but yield the response text in chunks as Gemini generates it.
+        
+        Tool calls are not streamed: when the model asks for a tool, the tool is
+        executed as in run() and the final answer is yielded as a single chunk.
+        """
+        self._append_user_turn(user_input, image_path)
+        chunks = []
+        fc = None
+        try:
+            for chunk in self.model.generate_content(self.history, stream=True):
+                for candidate in getattr(chunk, "candidates", None) or []:
+                    for part in getattr(getattr(candidate, "content", None), "parts", None) or []:
+                        if hasattr(part, "function_call") and part.function_call:
+                            fc = part.function_call
+                            break
+                        if hasattr(part, "text") and part.text:
+                            chunks.append(part.text)
+                            yield part.text
+                    if fc:
+                        break
+                if fc:
+                    break
+        except Exception as e:
+            if not chunks:
+                # Nothing sent yet: fall back to run(), which has the rate-limit retries
+                print(f"[Agent] Streaming failed ({e}), falling back to run()")
+                self.history.pop()
+                yield self.run(user_input, image_path)
+                return
+            print(f"[Agent] Stream interrupted: {e}")
+        
+        if fc:
+            yield self._handle_function_call(fc)
+            return
+        
+        text = "".join(chunks)
+        if not text.strip():
+            text = "I processed your request but didn't receive a response. Please try again."
+            yield text
+        self.history.append({"role": "model", "parts": [text]})
+
 def run_multimodal_interactive():
     agent = MultimodalAgent()
     print("🎨 Multimodal Personal Assistant")
@@ -4,14 +4,26 @@ Tool-Enabled Agent Example using Google ADK
 This example demonstrates how to create an agent with custom tools.
 """
 
+import asyncio
+import atexit
+import functools
+import inspect
+import json
 import os
+import queue
+import sqlite3
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone as dt_timezone
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Dict, Any, Mapping, Optional, get_type_hints
 
 # Setup compatibility fixes (handles Python 3.9 issues)
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.compat import setup_compatibility
+from tools.calculator import CalculatorTool
+from utils.history import HistoryCompactor
 setup_compatibility()
 
 import google.generativeai as genai
@@ -40,22 +52,81 @@ except Exception as e:
     print("Get a valid API key from: https://aistudio.google.com/")
     raise
 
+# Characters accepted by the calculator tool
+_CALC_ALLOWED = frozenset("0123456789+-*/()., ")
+
+# Browser User-Agent for the DuckDuckGo HTML fallback
+_UA = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+# REPL commands that end the session
+_EXIT_CMDS = frozenset({'quit', 'exit', 'q'})
+
+# Shared safe evaluator (bounds exponents and result size)
+_CALC = CalculatorTool()
+
 # Custom tools for the agent
 def calculator(expression: str) -> str:
-    """Evaluate a mathematical expression safely."""
+    """Evaluate a mathematical expression. Input should be a valid Python expression.
+
+    Args:
+        expression: The mathematical expression to evaluate (e.g., '2 + 2', '10 * 5')
+    """
     try:
         # Only allow safe mathematical operations
-        allowed_chars = set("0123456789+-*/()., ")
-        if not all(c in allowed_chars for c in expression):
+        if not _CALC_ALLOWED.issuperset(expression):
             return "Error: Invalid characters in expression"
         
-        result = eval(expression)
-        return str(result)
+        return str(_CALC.calculate(expression))
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Equivalent DuckDuckGo endpoints raced by the web_search fallback
+_DDG_FALLBACK_URLS = (
+    "https://html.duckduckgo.com/html/?q={}",
+    "https://lite.duckduckgo.com/lite/?q={}",
+)
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+_http_session = None
+
+def _get_http_session():
+    """Return a shared requests.Session so fallback searches reuse connections."""
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+        _http_session.headers.update(_UA)
+    return _http_session
+
+def _race_fetch(urls, timeout: float = 5):
+    """Fetch equivalent URLs concurrently and return the first 200 response.
+    
+    Falls back to the last non-200 response; raises the last error if every request failed.
+    """
+    session = _get_http_session()
+    futures = [_SEARCH_POOL.submit(session.get, url, timeout=timeout) for url in urls]
+    response, error = None, None
+    try:
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if response.status_code == 200:
+                return response
+    finally:
+        for future in futures:
+            future.cancel()
+    if response is None:
+        raise error
+    return response
+
 def web_search(query: str, num_results: int = 5) -> str:
-    """Search the web for information. Returns search results summary.
+    """Search the web for information on any topic. Use this when you need current information, facts, or data from the internet.
+    
+    Args:
+        query: The search query or question to search for on the web
+        num_results: Number of search results to return (default: 5, max: 10)
     
     Note: This uses DuckDuckGo search. For production, consider using:
     - Google Custom Search API (requires API key)
@@ -72,26 +143,20 @@ def web_search(query: str, num_results: int = 5) -> str:
                 if not results:
                     return f"No search results found for: {query}"
                 
-                summary = f"Search results for '{query}':\n\n"
+                parts = [f"Search results for '{query}':\n"]
                 for i, result in enumerate(results, 1):
                     title = result.get('title', 'No title')
-                    snippet = result.get('body', 'No description')
+                    snippet = result.get('body', 'No description')[:150]
                     url = result.get('href', 'No URL')
-                    summary += f"{i}. {title}\n   {snippet[:150]}...\n   URL: {url}\n\n"
+                    parts.append(f"{i}. {title}\n   {snippet}...\n   URL: {url}\n")
                 
-                return summary.strip()
+                return "\n".join(parts).rstrip()
         except ImportError:
-            # Fallback: Use requests to DuckDuckGo HTML (simpler but less reliable)
-            import requests
+            # Fallback: Race the DuckDuckGo HTML and Lite pages (simpler but less reliable)
             from urllib.parse import quote
             
-            url = f"https://html.duckduckgo.com/html/?q={quote(query)}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
             try:
-                response = requests.get(url, headers=headers, timeout=5)
+                response = _race_fetch([url.format(quote(query)) for url in _DDG_FALLBACK_URLS])
                 if response.status_code == 200:
                     return f"Web search performed for: {query}\n[Note: Install 'duckduckgo-search' package for better results: pip install duckduckgo-search]"
                 else:
@@ -102,7 +167,10 @@ def web_search(query: str, num_results: int = 5) -> str:
         return f"Error performing web search: {str(e)}"
 
 def get_weather(location: str) -> str:
-    """Get current weather information for a location.
+    """Get current weather information for a specific location.
+    
+    Args:
+        location: The location name (e.g., 'New York', 'London', 'Tokyo')
     
     Note: This is a placeholder. For production, use:
     - OpenWeatherMap API (requires API key)
@@ -116,182 +184,137 @@ def get_weather(location: str) -> str:
            f"- Humidity: [Use weather API to get real data]\n\n" \
            f"To enable real weather data, integrate with OpenWeatherMap API or similar service."
 
+# One strftime call yields date|time|weekday|zone for get_current_time
+_TIME_FMT = '%Y-%m-%d|%H:%M:%S|%A|%Z'
+_now = datetime.now
+
+# zoneinfo (stdlib, Python 3.9+) is preferred; pytz is only used on older interpreters
+try:
+    from zoneinfo import ZoneInfo
+    _USE_ZI = True
+except ImportError:
+    _USE_ZI = False
+
+@functools.lru_cache(maxsize=64)
+def _tz(name: str):
+    """Look up a timezone by IANA name, caching the parsed zone.
+    
+    Raises KeyError (ZoneInfoNotFoundError / UnknownTimeZoneError) or
+    ValueError for unknown or malformed names.
+    """
+    if _USE_ZI:
+        return ZoneInfo(name)
+    import pytz
+    return pytz.timezone(name)
+
+def _format_time(now, header: str) -> str:
+    """Format the get_current_time report from a single strftime call."""
+    date, clock, day, zone = now.strftime(_TIME_FMT).split('|')
+    return f"{header}\n" \
+           f"- Date: {date}\n" \
+           f"- Time: {clock}\n" \
+           f"- Day: {day}\n" \
+           f"- Full: {date} {clock} {zone}"
+
 def get_current_time(timezone: str = "UTC") -> str:
-    """Get the current date and time for a specified timezone.
+    """Get the current date and time for a specified timezone. Useful for scheduling, reminders, or time-sensitive queries.
     
     Args:
-        timezone: Timezone name (e.g., 'UTC', 'America/New_York', 'Asia/Tokyo')
+        timezone: Timezone name (e.g., 'UTC', 'America/New_York', 'Asia/Tokyo', 'Europe/London'). Default is UTC if not provided.
     """
     try:
-        from datetime import datetime
-        import pytz
-        
-        if timezone == "UTC":
-            tz = pytz.UTC
-        else:
-            try:
-                tz = pytz.timezone(timezone)
-            except pytz.exceptions.UnknownTimeZoneError:
-                tz = pytz.UTC
-                now = datetime.now(tz)
-                return f"Unknown timezone '{timezone}'. Using UTC instead.\n" \
-                       f"Current time in UTC:\n" \
-                       f"- Date: {now.strftime('%Y-%m-%d')}\n" \
-                       f"- Time: {now.strftime('%H:%M:%S')}\n" \
-                       f"- Day: {now.strftime('%A')}\n" \
-                       f"- Full: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}"
-        
-        now = datetime.now(tz)
-        return f"Current time in {timezone}:\n" \
-               f"- Date: {now.strftime('%Y-%m-%d')}\n" \
-               f"- Time: {now.strftime('%H:%M:%S')}\n" \
-               f"- Day: {now.strftime('%A')}\n" \
-               f"- Full: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}"
+        tz = dt_timezone.utc if timezone == "UTC" else _tz(timezone)
     except ImportError:
-        # Fallback without pytz
-        from datetime import datetime
-        now = datetime.now()
+        # Fallback without zoneinfo or pytz
+        date, clock, day, _ = _now().strftime(_TIME_FMT).split('|')
         return f"Current time (local):\n" \
-               f"- Date: {now.strftime('%Y-%m-%d')}\n" \
-               f"- Time: {now.strftime('%H:%M:%S')}\n" \
-               f"- Day: {now.strftime('%A')}\n" \
+               f"- Date: {date}\n" \
+               f"- Time: {clock}\n" \
+               f"- Day: {day}\n" \
                f"[Note: Install 'pytz' for timezone support: pip install pytz]"
+    except (KeyError, ValueError):
+        return f"Unknown timezone '{timezone}'. Using UTC instead.\n" + \
+               _format_time(_now(dt_timezone.utc), "Current time in UTC:")
+    
+    return _format_time(_now(tz), f"Current time in {timezone}:")
+
+# SQLite-backed note storage. Writes are queued to a background thread so
+# create_note returns immediately; reads flush the queue first.
+NOTES_DB_PATH = os.path.expanduser(os.getenv("AGENT_NOTES_DB", "~/.agent_notes.db"))
+_NOTE_WRITES: "queue.Queue[tuple]" = queue.Queue()
+_notes_conn: Optional[sqlite3.Connection] = None
+_notes_lock = threading.Lock()
+
+def _open_notes_db() -> sqlite3.Connection:
+    """Open a connection to the notes database, creating the table if needed."""
+    conn = sqlite3.connect(NOTES_DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS notes(title TEXT PRIMARY KEY, content TEXT, created TEXT)")
+    return conn
+
+def _note_writer():
+    """Drain queued note writes into the database (runs on a daemon thread)."""
+    conn = _open_notes_db()
+    while True:
+        row = _NOTE_WRITES.get()
+        try:
+            conn.execute("INSERT OR REPLACE INTO notes VALUES (?, ?, ?)", row)
+        except sqlite3.Error as e:
+            print(f"⚠️  Failed to save note '{row[0]}': {e}")
+        finally:
+            _NOTE_WRITES.task_done()
+
+def _notes_db() -> sqlite3.Connection:
+    """Return the reader connection, starting the writer thread on first use."""
+    global _notes_conn
+    if _notes_conn is None:
+        # Tools run in parallel; only one caller may start the writer
+        with _notes_lock:
+            if _notes_conn is None:
+                conn = _open_notes_db()
+                threading.Thread(target=_note_writer, name="note-writer", daemon=True).start()
+                # Don't drop queued notes when the REPL exits
+                atexit.register(_NOTE_WRITES.join)
+                _notes_conn = conn
+    return _notes_conn
 
 def create_note(title: str, content: str) -> str:
-    """Create and save a note with a title and content.
+    """Create and save a note with a title and content. Useful for reminders, to-do items, or storing information.
     
-    Note: This is a simple in-memory storage. For production, use a database or file system.
-    """
-    # Simple in-memory storage (resets when program restarts)
-    if not hasattr(create_note, 'notes'):
-        create_note.notes = {}
+    Args:
+        title: The title or name of the note
+        content: The content or body of the note
     
-    from datetime import datetime
-    create_note.notes[title] = {
-        'content': content,
-        'created': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    }
+    Note: Notes are persisted to a local SQLite database (AGENT_NOTES_DB, default ~/.agent_notes.db).
+    """
+    _notes_db()
+    _NOTE_WRITES.put((title, content, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
     
-    return f"Note created successfully!\n" \
+    return f"Note queued for saving.\n" \
            f"- Title: {title}\n" \
            f"- Content: {content[:100]}{'...' if len(content) > 100 else ''}\n" \
-           f"- Total notes saved: {len(create_note.notes)}"
+           f"- Saving to: {NOTES_DB_PATH}"
 
 def get_note(title: str) -> str:
-    """Retrieve a saved note by title."""
-    if not hasattr(create_note, 'notes'):
-        create_note.notes = {}
+    """Retrieve a previously saved note by its title.
+
+    Args:
+        title: The title of the note to retrieve
+    """
+    conn = _notes_db()
+    # Make sure any pending writes are visible
+    _NOTE_WRITES.join()
     
-    if title in create_note.notes:
-        note = create_note.notes[title]
+    note = conn.execute("SELECT content, created FROM notes WHERE title = ?", (title,)).fetchone()
+    if note:
         return f"Note: {title}\n" \
-               f"Content: {note['content']}\n" \
-               f"Created: {note.get('created', 'Unknown')}"
+               f"Content: {note[0]}\n" \
+               f"Created: {note[1] or 'Unknown'}"
     else:
-        available = list(create_note.notes.keys()) if create_note.notes else []
+        available = [row[0] for row in conn.execute("SELECT title FROM notes ORDER BY title")]
         return f"Note '{title}' not found.\n" \
                f"Available notes: {', '.join(available) if available else 'None'}"
 
-# Tool definitions for Gemini
-TOOLS = [
-    {
-        "function_declarations": [
-            {
-                "name": "calculator",
-                "description": "Evaluate a mathematical expression. Input should be a valid Python expression.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "expression": {
-                            "type": "string",
-                            "description": "The mathematical expression to evaluate (e.g., '2 + 2', '10 * 5')"
-                        }
-                    },
-                    "required": ["expression"]
-                }
-            },
-            {
-                "name": "web_search",
-                "description": "Search the web for information on any topic. Use this when you need current information, facts, or data from the internet.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The search query or question to search for on the web"
-                        },
-                        "num_results": {
-                            "type": "integer",
-                            "description": "Number of search results to return (default: 5, max: 10)"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            },
-            {
-                "name": "get_weather",
-                "description": "Get current weather information for a specific location.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "location": {
-                            "type": "string",
-                            "description": "The location name (e.g., 'New York', 'London', 'Tokyo')"
-                        }
-                    },
-                    "required": ["location"]
-                }
-            },
-            {
-                "name": "get_current_time",
-                "description": "Get the current date and time for a specified timezone. Useful for scheduling, reminders, or time-sensitive queries.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "timezone": {
-                            "type": "string",
-                            "description": "Timezone name (e.g., 'UTC', 'America/New_York', 'Asia/Tokyo', 'Europe/London'). Default is UTC if not provided."
-                        }
-                    },
-                    "required": []
-                }
-            },
-            {
-                "name": "create_note",
-                "description": "Create and save a note with a title and content. Useful for reminders, to-do items, or storing information.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "The title or name of the note"
-                        },
-                        "content": {
-                            "type": "string",
-                            "description": "The content or body of the note"
-                        }
-                    },
-                    "required": ["title", "content"]
-                }
-            },
-            {
-                "name": "get_note",
-                "description": "Retrieve a previously saved note by its title.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {
-                            "type": "string",
-                            "description": "The title of the note to retrieve"
-                        }
-                    },
-                    "required": ["title"]
-                }
-            }
-        ]
-    }
-]
-
 # Tool execution mapping
 TOOL_FUNCTIONS = {
     "calculator": calculator,
@@ -302,15 +325,60 @@ TOOL_FUNCTIONS = {
     "get_note": get_note,
 }
 
-def create_tool_agent():
-    """Create an agent with tools."""
-    # Use model from env or default to gemini-2.5
-    model_name = os.getenv("GEMINI_MODEL", "gemini-2.5")
-    
-    model = genai.GenerativeModel(
-        model_name=model_name,
-        tools=TOOLS,
-        system_instruction="""You are a helpful personal assistant with access to various tools.
+# Python type -> JSON schema type for tool parameters
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+}
+
+def _parse_arg_docs(doc: str) -> Dict[str, str]:
+    """Extract per-parameter descriptions from a Google-style 'Args:' section."""
+    arg_docs = {}
+    in_args = False
+    for line in doc.splitlines():
+        stripped = line.strip()
+        if stripped == "Args:":
+            in_args = True
+            continue
+        if in_args:
+            if not stripped:
+                break
+            name, sep, desc = stripped.partition(":")
+            if sep:
+                arg_docs[name.strip()] = desc.strip()
+    return arg_docs
+
+@functools.cache
+def _schema_from_fn(fn) -> Dict[str, Any]:
+    """Build a Gemini function declaration from a function's signature and docstring."""
+    doc = inspect.getdoc(fn) or ""
+    arg_docs = _parse_arg_docs(doc)
+    hints = get_type_hints(fn)
+    properties = {}
+    required = []
+    for name, param in inspect.signature(fn).parameters.items():
+        prop = {"type": _JSON_TYPES.get(hints.get(name, str), "string")}
+        if name in arg_docs:
+            prop["description"] = arg_docs[name]
+        properties[name] = prop
+        if param.default is inspect.Parameter.empty:
+            required.append(name)
+    return {
+        "name": fn.__name__,
+        "description": doc.split("\n\n")[0].replace("\n", " "),
+        "parameters": {
+            "type": "object",
+            "properties": properties,
+            "required": required,
+        },
+    }
+
+# Tool definitions for Gemini, generated from TOOL_FUNCTIONS
+TOOLS = [{"function_declarations": [_schema_from_fn(f) for f in TOOL_FUNCTIONS.values()]}]
+
+SYSTEM_PROMPT = """You are a helpful personal assistant with access to various tools.
         
         You can help users with:
         - Calculations using the calculator tool
@@ -328,40 +396,67 @@ def create_tool_agent():
         - Retrieving saved information → use get_note tool
         
         Always explain what you're doing and provide helpful, clear responses."""
-    )
-    return model
 
-def execute_tool(function_name: str, args: Dict[str, Any]) -> str:
-    """Execute a tool function."""
+# Shared model instance, created on first use and reused across sessions
+_MODEL: Optional[genai.GenerativeModel] = None
+
+def create_tool_agent():
+    """Create an agent with tools (shared across calls)."""
+    global _MODEL
+    if _MODEL is None:
+        # Use model from env or default to gemini-2.5
+        model_name = os.getenv("GEMINI_MODEL", "gemini-2.5")
+        _MODEL = genai.GenerativeModel(
+            model_name=model_name,
+            tools=TOOLS,
+            system_instruction=SYSTEM_PROMPT
+        )
+    return _MODEL
+
+def execute_tool(function_name: str, args: Mapping[str, Any]) -> str:
+    """Execute a tool function.
+    
+    args may be the function call's protobuf map view; it is unpacked
+    directly and optional parameters fall back to the tool's defaults.
+    """
     if function_name in TOOL_FUNCTIONS:
         func = TOOL_FUNCTIONS[function_name]
         try:
-            # Handle optional parameters with defaults
-            if function_name == "web_search" and "num_results" not in args:
-                args["num_results"] = 5
-            elif function_name == "get_current_time" and "timezone" not in args:
-                args["timezone"] = "UTC"
-            
             return func(**args)
         except TypeError as e:
             # Handle missing required arguments gracefully
             return f"Error executing {function_name}: {str(e)}"
     return f"Error: Tool '{function_name}' not found"
 
+# History compaction: once a chat grows past HISTORY_MAX_MESSAGES, older
+# turns are summarized on a worker thread and spliced in on the next turn
+HISTORY_MAX_MESSAGES = 20
+HISTORY_KEEP_MESSAGES = 15
+
+def _function_response_content(results):
+    """Wrap (tool name, result) pairs as a function-response message for a chat session."""
+    return genai.protos.Content(parts=[
+        genai.protos.Part(function_response=genai.protos.FunctionResponse(
+            name=name,
+            response={"result": result}
+        ))
+        for name, result in results
+    ])
+
 def print_debug_info(step_name, data, debug_mode=False):
     """Print debugging information if debug mode is enabled."""
     if not debug_mode:
         return
     
-    print(f"\n{'='*60}")
-    print(f"🔍 DEBUG: {step_name}")
-    print(f"{'='*60}")
+    separator = '=' * 60
+    sys.stdout.write(f"\n{separator}\n🔍 DEBUG: {step_name}\n{separator}\n")
     if isinstance(data, dict):
-        import json
-        print(json.dumps(data, indent=2, default=str))
+        json.dump(data, sys.stdout, indent=2, default=str)
+        sys.stdout.write("\n")
     else:
-        print(str(data))
-    print(f"{'='*60}\n")
+        sys.stdout.write(f"{data}\n")
+    sys.stdout.write(f"{separator}\n\n")
+    sys.stdout.flush()
 
 def run_tool_agent_interactive(debug=False):
     """Run the tool-enabled agent in interactive mode.
@@ -370,7 +465,10 @@ def run_tool_agent_interactive(debug=False):
         debug: If True, show detailed debugging information about tool usage
     """
     agent = create_tool_agent()
-    conversation_history = []
+    # The chat session owns the conversation history and only commits a
+    # turn once the model has answered it
+    chat = agent.start_chat()
+    compactor = HistoryCompactor(HISTORY_MAX_MESSAGES, HISTORY_KEEP_MESSAGES)
     
     print("🤖 Personal Assistant Agent")
     print("=" * 50)
@@ -384,7 +482,7 @@ def run_tool_agent_interactive(debug=False):
     while True:
         user_input = input("You: ").strip()
         
-        if user_input.lower() in ['quit', 'exit', 'q']:
+        if user_input.lower() in _EXIT_CMDS:
             print("\nGoodbye!")
             break
         
@@ -396,40 +494,36 @@ def run_tool_agent_interactive(debug=False):
         if user_input.lower() == 'history':
             print("\n📜 Conversation History:")
             print("=" * 50)
-            for i, msg in enumerate(conversation_history, 1):
-                role = msg.get('role', 'unknown')
-                parts = msg.get('parts', [])
+            for i, msg in enumerate(chat.history, 1):
+                role = msg.role or 'unknown'
                 print(f"\n{i}. [{role.upper()}]")
-                for part in parts:
-                    if isinstance(part, str):
-                        print(f"   Text: {part[:100]}...")
-                    elif isinstance(part, dict):
-                        if 'function_call' in part:
-                            fc = part['function_call']
-                            print(f"   Function Call: {fc.name}")
-                            print(f"   Args: {dict(fc.args)}")
-                        elif 'function_response' in part:
-                            fr = part['function_response']
-                            print(f"   Function Response: {fr.get('name', 'unknown')}")
-                            print(f"   Result: {str(fr.get('response', {}))[:100]}...")
+                for part in msg.parts:
+                    if part.function_call:
+                        fc = part.function_call
+                        print(f"   Function Call: {fc.name}")
+                        print(f"   Args: {dict(fc.args)}")
+                    elif part.function_response:
+                        fr = part.function_response
+                        print(f"   Function Response: {fr.name or 'unknown'}")
+                        print(f"   Result: {str(fr.response)[:100]}...")
+                    elif part.text:
+                        print(f"   Text: {part.text[:100]}...")
             print("\n")
             continue
         
         if not user_input:
             continue
         
+        compactor.apply(chat)
+        history_len = len(chat.history)
         try:
-            # Add user message to conversation
-            user_msg = {"role": "user", "parts": [user_input]}
-            conversation_history.append(user_msg)
-            
             if debug:
                 print(f"\n📤 Sending to model:")
                 print(f"   User: {user_input}")
-                print_debug_info("Conversation History Before Request", conversation_history, debug)
+                print_debug_info("Conversation History Before Request", chat.history, debug)
             
             # Generate response
-            response = agent.generate_content(conversation_history)
+            response = chat.send_message(user_input)
             
             if debug:
                 print(f"\n📥 Raw Response from Model:")
@@ -457,48 +551,34 @@ def run_tool_agent_interactive(debug=False):
             if function_call:
                 # Execute function call
                 function_name = function_call.name
-                args = dict(function_call.args)
+                args = function_call.args
                 
-                print(f"\n{'='*60}")
-                print(f"🔧 TOOL EXECUTION")
-                print(f"{'='*60}")
-                print(f"Tool: {function_name}")
-                print(f"Arguments: {args}")
-                print(f"{'='*60}")
+                separator = '=' * 60
+                sys.stdout.write("\n".join([
+                    f"\n{separator}",
+                    "🔧 TOOL EXECUTION",
+                    separator,
+                    f"Tool: {function_name}",
+                    f"Arguments: {dict(args)}",
+                    separator,
+                    "",
+                ]))
+                sys.stdout.flush()
                 
                 # Execute the tool
                 tool_result = execute_tool(function_name, args)
-                print(f"✅ Tool Result: {tool_result}")
-                print(f"{'='*60}\n")
+                sys.stdout.write(f"✅ Tool Result: {tool_result}\n{separator}\n\n")
+                sys.stdout.flush()
                 
-                # Add model's function call to conversation
-                model_function_msg = {
-                    "role": "model",
-                    "parts": [{"function_call": function_call}]
-                }
-                conversation_history.append(model_function_msg)
+                # Send the tool result back as a function response
+                function_response_msg = _function_response_content([(function_name, tool_result)])
                 
                 if debug:
-                    print_debug_info("Added Function Call to History", model_function_msg, debug)
-                
-                # Add function response to conversation
-                function_response_msg = {
-                    "role": "function",
-                    "parts": [{
-                        "function_response": {
-                            "name": function_name,
-                            "response": {"result": tool_result}
-                        }
-                    }]
-                }
-                conversation_history.append(function_response_msg)
-                
-                if debug:
-                    print_debug_info("Added Function Response to History", function_response_msg, debug)
+                    print_debug_info("Function Response", function_response_msg, debug)
                     print(f"\n🔄 Sending tool result back to model for final response...")
                 
                 # Get final response with tool result
-                final_response = agent.generate_content(conversation_history)
+                final_response = chat.send_message(function_response_msg)
                 
                 if debug:
                     print(f"\n📥 Final Response from Model:")
@@ -506,18 +586,11 @@ def run_tool_agent_interactive(debug=False):
                     if hasattr(final_response, 'text'):
                         print(f"   Text length: {len(final_response.text)}")
                 
-                # Add final response to conversation
                 final_text = final_response.text if hasattr(final_response, 'text') else ""
-                final_model_msg = {
-                    "role": "model",
-                    "parts": [final_text] if final_text else []
-                }
-                conversation_history.append(final_model_msg)
-                
                 print(f"\n💬 Agent: {final_text}\n")
                 
                 if debug:
-                    print_debug_info("Final Conversation State", conversation_history[-3:], debug)
+                    print_debug_info("Final Conversation State", chat.history[-3:], debug)
             else:
                 # Regular text response (no function calls)
                 response_text = " ".join(text_parts) if text_parts else (response.text if hasattr(response, 'text') else "")
@@ -526,14 +599,15 @@ def run_tool_agent_interactive(debug=False):
                     print(f"\n📝 TEXT RESPONSE (No tools used)")
                     print(f"   Response: {response_text[:200]}...")
                 
-                model_msg = {
-                    "role": "model",
-                    "parts": [response_text] if response_text else []
-                }
-                conversation_history.append(model_msg)
                 print(f"\n💬 Agent: {response_text}\n")
+            
+            compactor.maybe_start(chat.history)
                 
         except Exception as e:
+            # Drop a half-finished turn (e.g. a function call whose response never
+            # reached the model) so the next message starts from a valid history
+            if len(chat.history) > history_len:
+                chat.history = chat.history[:history_len]
             error_msg = str(e)
             if "function_call" in error_msg.lower() or "could not convert" in error_msg.lower():
                 print(f"\n⚠️  Error: Model returned a function call but couldn't process it.")
@@ -542,9 +616,83 @@ def run_tool_agent_interactive(debug=False):
             else:
                 print(f"\nError: {error_msg}\n")
 
+async def run_tool_agent_interactive_async(debug=False):
+    """Run the tool-enabled agent in interactive mode on an asyncio event loop.
+    
+    Model calls use send_message_async, and when the model requests
+    several tools in one turn they run concurrently in worker threads.
+    
+    Args:
+        debug: If True, show detailed debugging information about tool usage
+    """
+    agent = create_tool_agent()
+    chat = agent.start_chat()
+    compactor = HistoryCompactor(HISTORY_MAX_MESSAGES, HISTORY_KEEP_MESSAGES)
+    
+    print("🤖 Personal Assistant Agent (async)")
+    print("=" * 50)
+    print("Available tools: calculator, web_search, get_weather, get_current_time, create_note, get_note")
+    if debug:
+        print("🐛 DEBUG MODE: Detailed tool usage will be shown")
+    print("Type 'quit' or 'exit' to end the conversation\n")
+    
+    while True:
+        user_input = (await asyncio.to_thread(input, "You: ")).strip()
+        
+        if user_input.lower() in _EXIT_CMDS:
+            print("\nGoodbye!")
+            break
+        
+        if not user_input:
+            continue
+        
+        compactor.apply(chat)
+        history_len = len(chat.history)
+        try:
+            response = await chat.send_message_async(user_input)
+            
+            function_calls = [
+                part.function_call
+                for part in response.candidates[0].content.parts
+                if hasattr(part, 'function_call') and part.function_call
+            ]
+            
+            if function_calls:
+                for fc in function_calls:
+                    print(f"🔧 Tool: {fc.name}")
+                    if debug:
+                        print(f"   Arguments: {dict(fc.args)}")
+                
+                # Run all requested tools concurrently
+                tool_results = await asyncio.gather(*[
+                    asyncio.to_thread(execute_tool, fc.name, fc.args)
+                    for fc in function_calls
+                ])
+                
+                if debug:
+                    for fc, result in zip(function_calls, tool_results):
+                        print(f"✅ {fc.name}: {result}")
+                
+                response = await chat.send_message_async(_function_response_content(
+                    [(fc.name, result) for fc, result in zip(function_calls, tool_results)]
+                ))
+            
+            response_text = response.text if hasattr(response, 'text') else ""
+            print(f"\n💬 Agent: {response_text}\n")
+            compactor.maybe_start(chat.history)
+            
+        except Exception as e:
+            # Drop a half-finished turn so the next message starts from a valid history
+            if len(chat.history) > history_len:
+                chat.history = chat.history[:history_len]
+            print(f"\nError: {str(e)}\n")
+
 if __name__ == "__main__":
     import sys
     # Enable debug mode with --debug flag
     debug_mode = "--debug" in sys.argv or "-d" in sys.argv
-    run_tool_agent_interactive(debug=debug_mode)
+    if "--async" in sys.argv:
+        asyncio.run(run_tool_agent_interactive_async(debug=debug_mode))
+    else:
+        run_tool_agent_interactive(debug=debug_mode)
 
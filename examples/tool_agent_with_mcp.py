@@ -17,18 +17,24 @@ Security Improvements:
 - Code duplication reduced by importing from tools module
 """
 
+import importlib
+import json
 import os
 import sys
+from datetime import datetime
 from dotenv import load_dotenv
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Mapping
 import time
 
 # Setup compatibility fixes
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.compat import setup_compatibility
+from utils.history import compact_history
 setup_compatibility()
 
 import google.generativeai as genai
+from google.generativeai.types import content_types, generation_types
 
 # Load environment variables
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
@@ -49,99 +55,95 @@ except Exception as e:
     print(f"\n❌ ERROR: Failed to configure Gemini API: {str(e)}")
     raise
 
+# Heavy optional modules (pytz, duckduckgo_search, ADK MCP) are imported on
+# first use and memoized here, so startup doesn't pay for unused features
+_MODS: Dict[str, Any] = {}
+
+def _lazy(name: str):
+    """Import a module on first use and cache it (raises ImportError if missing)."""
+    module = _MODS.get(name)
+    if module is None:
+        module = _MODS[name] = importlib.import_module(name)
+    return module
+
 # ============================================================================
 # NATIVE TOOLS - Import from tools module to avoid duplication
 # ============================================================================
 
-# Import calculator tool for safe evaluation
-try:
-    from tools.calculator import CalculatorTool
-    _calc_tool = CalculatorTool()
-    
-    def calculator(expression: str) -> str:
-        """Evaluate a mathematical expression safely using CalculatorTool."""
-        result = _calc_tool.calculate(expression)
-        return str(result)
-except ImportError:
-    # Fallback: safer eval with restricted environment
-    import ast
-    import operator
-    
-    def calculator(expression: str) -> str:
-        """Evaluate a mathematical expression safely (fallback implementation)."""
-        try:
-            # Only allow numbers, operators, and parentheses
-            allowed_chars = set("0123456789+-*/()., ")
-            if not all(c in allowed_chars for c in expression):
-                return "Error: Invalid characters in expression"
-            
-            # Use ast.literal_eval for simple numbers, but for expressions with operators,
-            # we need a safer approach. For now, use eval with restricted environment.
-            # In production, consider using a proper expression parser library.
-            safe_dict = {
-                "__builtins__": {},
-                "abs": abs,
-                "round": round,
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "pow": pow,
-            }
-            safe_dict.update({k: v for k, v in operator.__dict__.items() if not k.startswith("_")})
-            
-            result = eval(expression, safe_dict, {})
-            return str(result)
-        except ZeroDivisionError:
-            return "Error: Division by zero"
-        except Exception as e:
-            return f"Error evaluating expression: {str(e)}"
+# Shared safe evaluator (bounds exponents and result size)
+from tools.calculator import CalculatorTool
+_calc_tool = CalculatorTool()
+
+def calculator(expression: str) -> str:
+    """Evaluate a mathematical expression safely using CalculatorTool."""
+    result = _calc_tool.calculate(expression)
+    return str(result)
+
+# Shared DuckDuckGo client, created on first search and reused afterwards
+_ddgs = None
+
+def _get_ddgs():
+    """Return the shared DDGS client (raises ImportError if duckduckgo-search is missing)."""
+    global _ddgs
+    if _ddgs is None:
+        _ddgs = _lazy("duckduckgo_search").DDGS()
+    return _ddgs
 
 def web_search(query: str, num_results: int = 5) -> str:
     """Search the web using DuckDuckGo."""
     try:
-        from duckduckgo_search import DDGS
+        results = list(_get_ddgs().text(query, max_results=num_results))
         
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=num_results))
-            
-            if not results:
-                return f"No results found for: {query}"
-            
-            summary = f"Search results for '{query}':\n\n"
-            for i, result in enumerate(results, 1):
-                title = result.get('title', 'No title')
-                snippet = result.get('body', result.get('description', 'No description'))
-                url = result.get('href', result.get('url', 'No URL'))
-                summary += f"{i}. {title}\n   {snippet[:150]}...\n   URL: {url}\n\n"
-            
-            return summary.strip()
+        if not results:
+            return f"No results found for: {query}"
+        
+        parts = [f"Search results for '{query}':\n\n"]
+        for i, result in enumerate(results, 1):
+            title = result.get('title', 'No title')
+            snippet = result.get('body', result.get('description', 'No description'))
+            url = result.get('href', result.get('url', 'No URL'))
+            parts.append(f"{i}. {title}\n   {snippet[:150]}...\n   URL: {url}\n\n")
+        
+        return "".join(parts).strip()
     except ImportError:
         return "Web search requires 'duckduckgo-search' package. Install: pip install duckduckgo-search"
     except Exception as e:
         return f"Error performing web search: {str(e)}"
 
+# Timezone support is optional (pytz); resolved zones are cached per name
+@lru_cache(maxsize=128)
+def _tz(name: str):
+    """Resolve a pytz timezone by name, caching the parsed zone."""
+    pytz = _lazy("pytz")
+    if name == "UTC":
+        return pytz.UTC
+    return pytz.timezone(name)
+
+# Most recently resolved zone; consecutive calls usually ask for the same one
+_last_tz_name = None
+_last_tz = None
+
 def get_current_time(timezone: str = "UTC") -> str:
     """Get the current date and time for a specified timezone."""
     try:
-        from datetime import datetime
-        import pytz
-        
-        if timezone == "UTC":
-            tz = pytz.UTC
-        else:
-            try:
-                tz = pytz.timezone(timezone)
-            except pytz.exceptions.UnknownTimeZoneError:
-                tz = pytz.UTC
-                now = datetime.now(tz)
-                return f"Unknown timezone '{timezone}'. Using UTC.\nCurrent time: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}"
-        
-        now = datetime.now(tz)
-        return f"Current time in {timezone}:\n- Date: {now.strftime('%Y-%m-%d')}\n- Time: {now.strftime('%H:%M:%S')}\n- Day: {now.strftime('%A')}"
+        pytz = _lazy("pytz")
     except ImportError:
-        from datetime import datetime
         now = datetime.now()
         return f"Current time (local): {now.strftime('%Y-%m-%d %H:%M:%S')}\n[Install 'pytz' for timezone support]"
+    
+    global _last_tz_name, _last_tz
+    if timezone == _last_tz_name:
+        tz = _last_tz
+    else:
+        try:
+            tz = _tz(timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            now = datetime.now(pytz.UTC)
+            return f"Unknown timezone '{timezone}'. Using UTC.\nCurrent time: {now.strftime('%Y-%m-%d %H:%M:%S %Z')}"
+        _last_tz_name, _last_tz = timezone, tz
+    
+    date, clock, day = datetime.now(tz).strftime('%Y-%m-%d|%H:%M:%S|%A').split('|')
+    return f"Current time in {timezone}:\n- Date: {date}\n- Time: {clock}\n- Day: {day}"
 
 # Native tool definitions for Gemini
 NATIVE_TOOLS = [
@@ -197,6 +199,9 @@ NATIVE_TOOLS = [
     }
 ]
 
+# NATIVE_TOOLS converted to protos.Tool once, so agent creation skips the dict-to-proto step
+_NATIVE_TOOLS_PROTO = content_types.to_function_library(NATIVE_TOOLS).to_proto()
+
 # Native tool execution mapping
 NATIVE_TOOL_FUNCTIONS = {
     "calculator": calculator,
@@ -208,20 +213,15 @@ NATIVE_TOOL_FUNCTIONS = {
 # MCP INTEGRATION
 # ============================================================================
 
-# Check if MCP is available
-try:
-    from google.adk.tools.mcp_tool import MCPToolset
-    from google.adk.tools.mcp_tool.mcp_session_manager import (
-        SseServerParams,
-        StreamableHTTPServerParams,
-        StdioServerParameters
-    )
-    MCP_AVAILABLE = True
-    print("✅ MCP support available")
-except ImportError as e:
-    MCP_AVAILABLE = False
-    print(f"⚠️  MCP not available: {e}")
-    print("   Continuing with native tools only...")
+def _mcp():
+    """Return the ADK MCP modules (mcp_tool, mcp_session_manager), importing them on first use."""
+    try:
+        return (
+            _lazy("google.adk.tools.mcp_tool"),
+            _lazy("google.adk.tools.mcp_tool.mcp_session_manager"),
+        )
+    except ImportError as e:
+        raise ImportError(f"MCP not available ({e}). Install: pip install google-adk") from e
 
 def create_mcp_toolset_sse(server_url: str, headers: Dict[str, str] = None) -> 'MCPToolset':
     """
@@ -234,11 +234,9 @@ def create_mcp_toolset_sse(server_url: str, headers: Dict[str, str] = None) -> '
     Returns:
         MCPToolset instance
     """
-    if not MCP_AVAILABLE:
-        raise ImportError("MCP not available. Install: pip install google-adk")
-    
-    return MCPToolset(
-        connection_params=SseServerParams(
+    mcp_tool, session_manager = _mcp()
+    return mcp_tool.MCPToolset(
+        connection_params=session_manager.SseServerParams(
             url=server_url,
             headers=headers or {},
         )
@@ -255,11 +253,9 @@ def create_mcp_toolset_http(server_url: str, headers: Dict[str, str] = None) ->
     Returns:
         MCPToolset instance
     """
-    if not MCP_AVAILABLE:
-        raise ImportError("MCP not available. Install: pip install google-adk")
-    
-    return MCPToolset(
-        connection_params=StreamableHTTPServerParams(
+    mcp_tool, session_manager = _mcp()
+    return mcp_tool.MCPToolset(
+        connection_params=session_manager.StreamableHTTPServerParams(
             url=server_url,
             headers=headers or {},
         )
@@ -277,11 +273,9 @@ def create_mcp_toolset_stdio(command: str, args: List[str] = None, env: Dict[str
     Returns:
         MCPToolset instance
     """
-    if not MCP_AVAILABLE:
-        raise ImportError("MCP not available. Install: pip install google-adk")
-    
-    return MCPToolset(
-        connection_params=StdioServerParameters(
+    mcp_tool, session_manager = _mcp()
+    return mcp_tool.MCPToolset(
+        connection_params=session_manager.StdioServerParameters(
             command=command,
             args=args or [],
             env=env or {},
@@ -292,6 +286,25 @@ def create_mcp_toolset_stdio(command: str, args: List[str] = None, env: Dict[str
 # AGENT CREATION
 # ============================================================================
 
+_SYSTEM_INSTRUCTION = """You are a helpful personal assistant with access to various tools.
+
+Available capabilities:
+- Calculator: Mathematical calculations
+- Web Search: Find current information on the internet
+- Time: Get current date/time for any timezone
+- MCP Tools: Additional tools from MCP servers (if available)
+
+Tool Usage Rules:
+1. Use web_search for current information, recent events, or data you don't have
+2. Use calculator for mathematical expressions
+3. Use get_current_time for date/time queries
+4. Use MCP tools for specialized capabilities they provide
+
+Always explain what you're doing and provide helpful responses."""
+
+# Agents already built in this process, keyed by (model, native tools, MCP config)
+_AGENTS: Dict[tuple, Any] = {}
+
 def create_agent_with_mcp(
     use_native_tools: bool = True,
     mcp_config: Dict[str, Any] = None
@@ -299,6 +312,9 @@ def create_agent_with_mcp(
     """
     Create agent with native tools and/or MCP tools.
     
+    Agents are cached per configuration, so repeated calls with the same
+    settings return the same GenerativeModel.
+    
     Args:
         use_native_tools: Whether to include native tools (calculator, web_search, etc.)
         mcp_config: MCP configuration dict with keys:
@@ -312,16 +328,24 @@ def create_agent_with_mcp(
         Configured GenerativeModel instance
     """
     model_name = os.getenv("GEMINI_MODEL", "gemini-2.5")
+    cache_key = (
+        model_name,
+        use_native_tools,
+        json.dumps(mcp_config, sort_keys=True, default=str) if mcp_config else None,
+    )
+    if cache_key in _AGENTS:
+        return _AGENTS[cache_key]
     
     tools = []
+    mcp_loaded = not mcp_config
     
     # Add native tools
     if use_native_tools:
-        tools.extend(NATIVE_TOOLS)
+        tools.extend(_NATIVE_TOOLS_PROTO)
         print(f"✅ Loaded {len(NATIVE_TOOL_FUNCTIONS)} native tools")
     
     # Add MCP tools
-    if mcp_config and MCP_AVAILABLE:
+    if mcp_config:
         try:
             mcp_type = mcp_config.get("type", "sse")
             
@@ -345,59 +369,126 @@ def create_agent_with_mcp(
                 raise ValueError(f"Unknown MCP type: {mcp_type}")
             
             tools.append(mcp_toolset)
+            mcp_loaded = True
             print(f"✅ Loaded MCP toolset from {mcp_config.get('url', mcp_config.get('command'))}")
         except Exception as e:
             print(f"⚠️  Failed to load MCP tools: {str(e)}")
             print("   Continuing with native tools only...")
     
-    system_instruction = """You are a helpful personal assistant with access to various tools.
-
-Available capabilities:
-- Calculator: Mathematical calculations
-- Web Search: Find current information on the internet
-- Time: Get current date/time for any timezone
-- MCP Tools: Additional tools from MCP servers (if available)
-
-Tool Usage Rules:
-1. Use web_search for current information, recent events, or data you don't have
-2. Use calculator for mathematical expressions
-3. Use get_current_time for date/time queries
-4. Use MCP tools for specialized capabilities they provide
-
-Always explain what you're doing and provide helpful responses."""
-    
     model = genai.GenerativeModel(
         model_name=model_name,
         tools=tools,
-        system_instruction=system_instruction
+        system_instruction=_SYSTEM_INSTRUCTION
     )
     
+    # Don't cache a degraded agent; retry MCP on the next call
+    if mcp_loaded:
+        _AGENTS[cache_key] = model
+    
     return model
 
-def is_native_tool(function_name: str) -> bool:
-    """Check if a function name is a native tool."""
-    return function_name in NATIVE_TOOL_FUNCTIONS
+# Native tool dispatch table: name -> (callable, default kwargs)
+_DISPATCH = {
+    "calculator": (calculator, {}),
+    "web_search": (web_search, {"num_results": 5}),
+    "get_current_time": (get_current_time, {"timezone": "UTC"}),
+}
 
-def execute_tool(function_name: str, args: Dict[str, Any]) -> str:
-    """Execute a native tool function."""
-    if function_name in NATIVE_TOOL_FUNCTIONS:
-        func = NATIVE_TOOL_FUNCTIONS[function_name]
-        try:
-            # Handle optional parameters
-            if function_name == "web_search" and "num_results" not in args:
-                args["num_results"] = 5
-            elif function_name == "get_current_time" and "timezone" not in args:
-                args["timezone"] = "UTC"
-            
-            return func(**args)
-        except TypeError as e:
-            return f"Error executing {function_name}: {str(e)}"
-    return f"Error: Tool '{function_name}' not found in native tools"
+def execute_tool(function_name: str, args: Mapping[str, Any]) -> str:
+    """Execute a native tool function.
+    
+    args may be the function call's protobuf map view; it is merged over
+    the tool's defaults without an intermediate dict copy.
+    """
+    try:
+        func, defaults = _DISPATCH[function_name]
+    except KeyError:
+        return f"Error: Tool '{function_name}' not found in native tools"
+    try:
+        return func(**{**defaults, **args})
+    except TypeError as e:
+        return f"Error executing {function_name}: {str(e)}"
 
 # ============================================================================
 # INTERACTIVE AGENT
 # ============================================================================
 
+def _function_response_content(function_name: str, response: Dict[str, Any]):
+    """Wrap a tool result as a function-response message for a chat session."""
+    return genai.protos.Content(parts=[
+        genai.protos.Part(function_response=genai.protos.FunctionResponse(
+            name=function_name,
+            response=response
+        ))
+    ])
+
+def _native_handler(function_name: str):
+    """Build a tool handler that runs a native tool and returns its function response."""
+    def handler(args, agent, chat):
+        tool_result = execute_tool(function_name, args)
+        print(f"✅ Tool Result: {tool_result}")
+        return {"result": tool_result}
+    return handler
+
+def _mcp_passthrough(args, agent, chat):
+    """Let ADK execute an MCP tool.
+    
+    Returns the function response to send back to the model, or the
+    model's reply text when the result is already integrated in it.
+    The chat history already ends with the model's function call.
+    """
+    final_response = agent.generate_content(chat.history)
+    
+    # Some MCP tools come back as an explicit function_response
+    if hasattr(final_response, 'candidates') and final_response.candidates:
+        for part in final_response.candidates[0].content.parts:
+            if hasattr(part, 'function_response') and part.function_response:
+                fr = part.function_response
+                tool_result = fr.response if hasattr(fr, 'response') else str(fr)
+                print(f"✅ MCP Tool Result: {tool_result}")
+                return tool_result if isinstance(tool_result, dict) else {"result": str(tool_result)}
+    
+    print(f"✅ MCP tool executed (result integrated in response)")
+    response_text = final_response.text if hasattr(final_response, 'text') else str(final_response)
+    chat.history = chat.history + [{"role": "model", "parts": [response_text]}]
+    return response_text
+
+# Tool name -> handler(args, agent, chat); unknown names are treated as MCP tools
+_TOOL_HANDLERS = {name: _native_handler(name) for name in _DISPATCH}
+
+# Sliding window: once the chat passes HISTORY_MAX_MESSAGES, everything but
+# roughly the last HISTORY_KEEP_MESSAGES is replaced by a summary
+HISTORY_MAX_MESSAGES = 40
+HISTORY_KEEP_MESSAGES = 20
+
+def _stream_text(response) -> str:
+    """Print the text of a streamed response as chunks arrive and return the full text."""
+    pieces = []
+    for chunk in response:
+        if not chunk.candidates:
+            continue
+        for part in chunk.candidates[0].content.parts:
+            if part.text:
+                if not pieces:
+                    sys.stdout.write("\nAgent: ")
+                pieces.append(part.text)
+                sys.stdout.write(part.text)
+                sys.stdout.flush()
+    if pieces:
+        sys.stdout.write("\n\n")
+    return "".join(pieces)
+
+def _rollback_turn(chat, history_len: int):
+    """Restore the chat history to history_len entries after a failed turn."""
+    try:
+        history = chat.history
+    except generation_types.BrokenResponseError:
+        # An interrupted stream blocks the session until it is rewound
+        chat.rewind()
+        history = chat.history
+    if len(history) > history_len:
+        chat.history = history[:history_len]
+
 def run_agent_interactive(
     use_native_tools: bool = True,
     mcp_config: Dict[str, Any] = None,
@@ -419,7 +510,8 @@ def run_agent_interactive(
     print("Type 'debug' to toggle debug mode")
     print("Type 'config' to see current configuration\n")
     
-    conversation_history = []
+    # The chat session keeps the conversation history
+    chat = agent.start_chat()
     
     while True:
         user_input = input("You: ").strip()
@@ -443,20 +535,17 @@ def run_agent_interactive(
         if not user_input:
             continue
         
+        history_len = len(chat.history)
         try:
-            # Add user message
-            user_msg = {"role": "user", "parts": [user_input]}
-            conversation_history.append(user_msg)
-            
             if debug:
                 print(f"\n📤 Sending to model...")
             
-            # Generate response
-            response = agent.generate_content(conversation_history)
+            # Stream the response; text is printed as it arrives
+            response = chat.send_message(user_input, stream=True)
+            streamed_text = _stream_text(response)
             
-            # Check for function calls
+            # Check for function calls (the stream has been fully consumed)
             function_call = None
-            text_parts = []
             
             for part in response.candidates[0].content.parts:
                 if hasattr(part, 'function_call') and part.function_call:
@@ -464,149 +553,55 @@ def run_agent_interactive(
                     if debug:
                         print(f"\n🔧 FUNCTION CALL DETECTED: {function_call.name}")
                         print(f"   Arguments: {dict(function_call.args)}")
-                elif hasattr(part, 'text') and part.text:
-                    text_parts.append(part.text)
             
             if function_call:
                 # Execute function call
                 function_name = function_call.name
-                args = dict(function_call.args)
+                args = function_call.args
                 
                 print(f"\n{'='*60}")
                 print(f"🔧 TOOL EXECUTION")
                 print(f"{'='*60}")
                 print(f"Tool: {function_name}")
-                print(f"Arguments: {args}")
+                print(f"Arguments: {dict(args)}")
                 print(f"{'='*60}")
                 
-                # Check if it's a native tool or MCP tool
-                if is_native_tool(function_name):
-                    # Native tool - execute manually
-                    tool_result = execute_tool(function_name, args)
-                    print(f"✅ Tool Result: {tool_result}")
-                    
-                    # Add function call to conversation
-                    model_function_msg = {
-                        "role": "model",
-                        "parts": [{"function_call": function_call}]
-                    }
-                    conversation_history.append(model_function_msg)
-                    
-                    # Add function response
-                    function_response_msg = {
-                        "role": "function",
-                        "parts": [{
-                            "function_response": {
-                                "name": function_name,
-                                "response": {"result": tool_result}
-                            }
-                        }]
-                    }
-                    conversation_history.append(function_response_msg)
-                    
-                    # Get final response
-                    final_response = agent.generate_content(conversation_history)
-                    response_text = final_response.text if hasattr(final_response, 'text') else str(final_response)
-                    
-                    # Add final response to history
-                    model_text_msg = {"role": "model", "parts": [response_text]}
-                    conversation_history.append(model_text_msg)
-                    
-                    print(f"{'='*60}\n")
-                    print(f"\nAgent: {response_text}\n")
-                else:
-                    # MCP tool - ADK handles execution automatically
-                    # Add function call to conversation and let ADK handle execution
-                    model_function_msg = {
-                        "role": "model",
-                        "parts": [{"function_call": function_call}]
-                    }
-                    conversation_history.append(model_function_msg)
-                    
+                # Native and MCP tools share one dispatch path
+                handler = _TOOL_HANDLERS.get(function_name, _mcp_passthrough)
+                try:
+                    outcome = handler(args, agent, chat)
+                except Exception as e:
+                    error_msg = f"Error executing tool '{function_name}': {str(e)}"
+                    print(f"❌ {error_msg}")
                     if debug:
-                        print(f"🔄 MCP tool execution handled by ADK...")
-                    
-                    try:
-                        # Call generate_content - ADK will execute MCP tool and return result
-                        # The response should contain the tool result integrated into the text
-                        final_response = agent.generate_content(conversation_history)
-                        
-                        # Extract response text
-                        response_text = final_response.text if hasattr(final_response, 'text') else str(final_response)
-                        
-                        # Check if there's a function_response in the response (some MCP tools might return this)
-                        function_response_found = False
-                        if hasattr(final_response, 'candidates') and final_response.candidates:
-                            for part in final_response.candidates[0].content.parts:
-                                if hasattr(part, 'function_response') and part.function_response:
-                                    # MCP tool returned a function_response
-                                    fr = part.function_response
-                                    tool_result = fr.response if hasattr(fr, 'response') else str(fr)
-                                    print(f"✅ MCP Tool Result: {tool_result}")
-                                    function_response_found = True
-                                    
-                                    # Add function response to history
-                                    function_response_msg = {
-                                        "role": "function",
-                                        "parts": [{
-                                            "function_response": {
-                                                "name": function_name,
-                                                "response": tool_result if isinstance(tool_result, dict) else {"result": str(tool_result)}
-                                            }
-                                        }]
-                                    }
-                                    conversation_history.append(function_response_msg)
-                                    
-                                    # Get final response after function response
-                                    final_response = agent.generate_content(conversation_history)
-                                    response_text = final_response.text if hasattr(final_response, 'text') else str(final_response)
-                                    break
-                        
-                        if not function_response_found:
-                            # MCP tool result is already integrated in the response text
-                            print(f"✅ MCP tool executed (result integrated in response)")
-                        
-                        # Add final response to history
-                        model_text_msg = {"role": "model", "parts": [response_text]}
-                        conversation_history.append(model_text_msg)
-                        
-                        print(f"{'='*60}\n")
-                        print(f"\nAgent: {response_text}\n")
-                    except Exception as e:
-                        error_msg = f"Error executing MCP tool '{function_name}': {str(e)}"
-                        print(f"❌ {error_msg}")
-                        if debug:
-                            import traceback
-                            traceback.print_exc()
-                        
-                        # Add error to conversation and get response
-                        error_response_msg = {
-                            "role": "function",
-                            "parts": [{
-                                "function_response": {
-                                    "name": function_name,
-                                    "response": {"error": error_msg}
-                                }
-                            }]
-                        }
-                        conversation_history.append(error_response_msg)
-                        
-                        try:
-                            error_response = agent.generate_content(conversation_history)
-                            error_text = error_response.text if hasattr(error_response, 'text') else str(error_response)
-                            conversation_history.append({"role": "model", "parts": [error_text]})
-                            print(f"\nAgent: {error_text}\n")
-                        except Exception as e2:
-                            print(f"\n❌ Failed to get error response: {str(e2)}\n")
+                        import traceback
+                        traceback.print_exc()
+                    outcome = {"error": error_msg}
+                
+                print(f"{'='*60}\n")
+                
+                if isinstance(outcome, str):
+                    # The tool result is already integrated in the model's reply
+                    print(f"\nAgent: {outcome}\n")
+                else:
+                    # Send the function response and stream the final answer
+                    _stream_text(chat.send_message(
+                        _function_response_content(function_name, outcome),
+                        stream=True
+                    ))
             
-            else:
-                # No function call, direct response
-                response_text = "".join(text_parts) if text_parts else response.text
-                model_msg = {"role": "model", "parts": [response_text]}
-                conversation_history.append(model_msg)
-                print(f"\nAgent: {response_text}\n")
+            elif not streamed_text:
+                # No function call and nothing streamed
+                print(f"\nAgent: {response.text}\n")
+            
+            try:
+                compact_history(chat, HISTORY_MAX_MESSAGES, HISTORY_KEEP_MESSAGES)
+            except Exception as e:
+                print(f"⚠️  Could not summarize conversation history: {str(e)}")
         
         except Exception as e:
+            # Drop the half-finished turn so the next message starts from a valid history
+            _rollback_turn(chat, history_len)
             print(f"\n❌ Error: {str(e)}\n")
             if debug:
                 import traceback
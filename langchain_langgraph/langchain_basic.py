@@ -5,7 +5,7 @@ from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables import RunnableLambda, RunnableParallel
 
 project_dir = Path(__file__).resolve().parent
 load_dotenv(dotenv_path=project_dir / ".env")
@@ -72,8 +72,12 @@ format_parsed_output = RunnableLambda(lambda output: {"parsed_feedback": output}
 summary_chain = parse_template | llm | format_parsed_output | summary_template | llm | StrOutputParser()
 sentiment_chain = sentiment_template| llm | StrOutputParser()
 
-summary = summary_chain.invoke({'raw_feedback' : user_feedback})
-sentiment = sentiment_chain.invoke({'feedback': user_feedback})
+# Summary and sentiment are independent, so run both LLM calls concurrently
+analysis_chain = RunnableParallel(summary=summary_chain, sentiment=sentiment_chain)
+
+analysis = analysis_chain.invoke({'raw_feedback': user_feedback, 'feedback': user_feedback})
+summary = analysis["summary"]
+sentiment = analysis["sentiment"]
 
 print("The summary of the user's message is:", summary)
 print("The sentiment was classifed as:", sentiment)
@@ -1,8 +1,13 @@
+import logging
+import os
 import random
 from typing import Literal
 from typing_extensions import TypedDict
 from langgraph.graph import StateGraph, START, END
 
+# Node tracing goes through logging: the state is only formatted when DEBUG is enabled
+log = logging.getLogger(__name__)
+
 # 1. Define the State (The Shared Memory)
 # We define a schema for our graph's memory using TypedDict.
 class State(TypedDict):
@@ -13,20 +18,20 @@ class State(TypedDict):
 # perform an action, and return an update to the state.
 
 def node_1(state):
-    print("---Node 1---")
+    log.debug("---Node 1---")
     # Appends " AGI" to the existing state string
-    print("state at node_1: \n ", state)
+    log.debug("state at node_1: %s", state)
     return {"graph_state": state['graph_state'] + " AGI"}
 
 def node_2(state):
-    print("---Node 2---")
-    print("state at node_2: \n ", state)
+    log.debug("---Node 2---")
+    log.debug("state at node_2: %s", state)
     # Appends " Achieved!"
     return {"graph_state": state['graph_state'] + " Achieved!"}
 
 def node_3(state):
-    print("---Node 3---")
-    print("state at node_3: \n ", state)
+    log.debug("---Node 3---")
+    log.debug("state at node_3: %s", state)
     # Appends " Not Achieved :("
     return {"graph_state": state['graph_state'] + " Not Achieved :("}
 
@@ -65,6 +70,8 @@ graph = builder.compile()
 
 # 6. Execute (Invoke)
 # We pass an initial state to start the workflow.
+# Set LOG_LEVEL=DEBUG to trace each node and its state.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
 
 
 #result = graph.invoke({"graph_state": "Has AGI been achieved?"})
@@ -1,10 +1,21 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import operator
 import os
+import sys
 import time
 import requests
+from functools import lru_cache
 from pathlib import Path
-from requests.exceptions import RequestException, Timeout
+from typing import Annotated, TypedDict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from langgraph.graph import MessagesState, StateGraph, START, END
+from langgraph.types import Send
 from langgraph.prebuilt import ToolNode, tools_condition
+import langchain_core
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
 from dotenv import load_dotenv
@@ -15,6 +26,8 @@ WEATHER_CODE_MAP = {
     45: "Fog", 61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
     75: "Heavy snow", 95: "Thunderstorm", 99: "Thunderstorm with hail"
 }
+# WMO codes are 0-99, so decode by tuple index instead of a dict lookup
+_WEATHER_CODE_ARR = tuple(WEATHER_CODE_MAP.get(i) for i in range(100))
 
 OPEN_METEO_GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
 OPEN_METEO_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
@@ -23,66 +36,106 @@ RETRY_ATTEMPTS = 2
 RETRY_BACKOFF_SECS = 0.6
 
 # --- Network Resilience Logic ---
+# One pooled session for all Open-Meteo calls: keep-alive connections are
+# reused across requests, and urllib3 handles retries with backoff.
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=RETRY_ATTEMPTS,
+        backoff_factor=RETRY_BACKOFF_SECS,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
 def _request_with_retries(method: str, url: str, **kwargs) -> requests.Response:
-    """Make an HTTP request with retries and backoff."""
-    last_exc = None
-    for attempt in range(RETRY_ATTEMPTS + 1):
-        try:
-            return requests.request(method, url, timeout=HTTP_TIMEOUT_SECS, **kwargs)
-        except (RequestException, Timeout) as exc:
-            last_exc = exc
-            if attempt < RETRY_ATTEMPTS:
-                time.sleep(RETRY_BACKOFF_SECS * (attempt + 1))
-            else:
-                raise last_exc
+    """Make an HTTP request on the shared session (retries and backoff via urllib3)."""
+    return _SESSION.request(method, url, timeout=HTTP_TIMEOUT_SECS, **kwargs)
+
+async def _arequest(method: str, url: str, **kwargs) -> requests.Response:
+    """Run a pooled-session request in a worker thread so tool calls can overlap."""
+    return await asyncio.to_thread(_request_with_retries, method, url, **kwargs)
 
 # --- Tools ---
-def geocode_city(name: str) -> dict:
-    """Look up latitude/longitude for a city using Open-Meteo."""
-    params = {"name": name, "count": 1, "format": "json"}
+# Tools are async so ToolNode gathers the calls from one LLM turn (e.g. one
+# per city) concurrently when the graph runs via ainvoke.
+@lru_cache(maxsize=1024)
+def _geocode_city_cached(name_norm: str) -> tuple:
+    """Geocode a normalized city name; city coordinates are static, so results are cached."""
+    params = {"name": name_norm, "count": 1, "format": "json"}
     resp = _request_with_retries("GET", OPEN_METEO_GEOCODE_URL, params=params)
     data = resp.json()
     results = data.get("results") or []
     if not results:
-        raise ValueError(f"Could not geocode city '{name}'.")
+        raise ValueError(f"Could not geocode city '{name_norm}'.")
     r0 = results[0]
+    return r0["name"], r0["latitude"], r0["longitude"]
+
+async def geocode_city(name: str) -> dict:
+    """Look up latitude/longitude for a city using Open-Meteo."""
+    city, lat, lon = await asyncio.to_thread(_geocode_city_cached, name.strip().lower())
     
-    res_lat_lon =  {"city": r0["name"], "lat": r0["latitude"], "lon": r0["longitude"]}
+    res_lat_lon =  {"city": city, "lat": lat, "lon": lon}
     print("res_lat_lon: \n ", res_lat_lon)
     
     return res_lat_lon
 
-def current_weather(lat: float, lon: float) -> dict:
+# Short-lived cache of current_weather results keyed by ~100 m rounded coordinates
+WEATHER_CACHE_TTL_SECS = 300
+WEATHER_CACHE_MAX_ENTRIES = 512
+_WX_CACHE: dict = {}  # (lat, lon) -> (expires_at, result)
+
+async def current_weather(lat: float, lon: float) -> dict:
     """Fetch current weather for coordinates using Open-Meteo."""
+    key = (round(lat, 3), round(lon, 3))
+    cached = _WX_CACHE.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    
     params = {
         "latitude": lat, "longitude": lon,
         "current": ["temperature_2m", "weather_code", "wind_speed_10m"],
         "timezone": "auto",
     }
     
-    resp = _request_with_retries("GET", OPEN_METEO_FORECAST_URL, params=params)
+    resp = await _arequest("GET", OPEN_METEO_FORECAST_URL, params=params)
     data = resp.json()
     cur = data.get("current")
     if not cur:
         raise ValueError("No weather data returned.")
-    return {
+    result = {
         "temperature": cur["temperature_2m"],
         "weather_code": cur["weather_code"],
         "windspeed": cur["wind_speed_10m"]
     }
+    
+    _WX_CACHE.pop(key, None)
+    if len(_WX_CACHE) >= WEATHER_CACHE_MAX_ENTRIES:
+        # Evict the oldest entry (dicts keep insertion order)
+        del _WX_CACHE[next(iter(_WX_CACHE))]
+    _WX_CACHE[key] = (time.monotonic() + WEATHER_CACHE_TTL_SECS, result)
+    return result
 
 # --- Formatting ---
 def format_weather_summary(city: str, payload: dict) -> str:
     """Decodes weather codes and returns a human-readable one-liner."""
     code = payload["weather_code"]
-    desc = WEATHER_CODE_MAP.get(code, f"Unknown weather code {code}")
-    temp_c = payload["temperature"]
-    wind = payload["windspeed"]
-    return f"{city}: {desc}, {round(temp_c)}°C, wind {round(wind, 1)} m/s"
+    desc = (0 <= code < 100 and _WEATHER_CODE_ARR[code]) or f"Unknown weather code {code}"
+    return f"{city}: {desc}, {round(payload['temperature'])}°C, wind {round(payload['windspeed'], 1)} m/s"
 
 # --- LangGraph Nodes & State ---
 class MyMessagesState(MessagesState):
-    pass
+    cities: list[str]
+    # Each city_pipeline branch appends its line; operator.add merges the
+    # parallel writes instead of letting the last branch overwrite the rest.
+    city_reports: Annotated[list[str], operator.add]
+
+class CityState(TypedDict):
+    city: str
 
 # Load .env located alongside this file
 project_dir = Path(__file__).resolve().parent
@@ -93,48 +146,116 @@ if not openai_api_key:
 
 llm = ChatOpenAI(model="gpt-4o", api_key=openai_api_key)
 
-llm_with_tools = llm.bind_tools([geocode_city, current_weather])
+WEATHER_TOOLS = [geocode_city, current_weather]
+
+# Tool JSON schemas are cached on disk, keyed by the tools' source, so
+# warm starts skip signature introspection and Pydantic schema building.
+TOOL_SCHEMA_CACHE_DIR = Path.home() / ".cache" / "agents"
+
+def _cached_bind_tools(model, tools):
+    """bind_tools() with the generated tool schemas cached on disk."""
+    src = langchain_core.__version__.encode() + b"".join(inspect.getsource(t).encode() for t in tools)
+    key = hashlib.blake2b(src, digest_size=8).hexdigest()
+    cache_file = TOOL_SCHEMA_CACHE_DIR / f"tools_{key}.json"
+    try:
+        return model.bind(tools=json.loads(cache_file.read_text()))
+    except (OSError, ValueError):
+        pass
+    bound = model.bind_tools(tools)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(bound.kwargs["tools"]))
+    except (OSError, TypeError, KeyError):
+        pass  # caching is best-effort
+    return bound
+
+llm_with_tools = _cached_bind_tools(llm, WEATHER_TOOLS)
+
+# System prompts are static, so build them once instead of on every node run
+_PLAN_SYS_MSG = SystemMessage(content=(
+    "List every city the user asks about, one per line, with no other text. "
+    "Reply with NONE if the user does not mention any city."
+))
+_TOOL_SYS_MSG = SystemMessage(content=(
+    "You are a helpful weather assistant. "
+    "When the user mentions cities, call geocode_city for each city, then call current_weather. "
+    "Prefer Celsius unless the user explicitly requests Fahrenheit/imperial."
+))
+_COMPOSE_SYS_MSG = SystemMessage(content=(
+    "Summarize any fetched weather results in plain language. "
+    "Output one line per city, with condition, temperature, and wind. "
+    "If any city failed, acknowledge it clearly instead of guessing."
+))
 
 # --- Nodes ---
+# plan_cities: one small LLM call to pull the city names out of the request
+async def plan_cities(state: MyMessagesState):
+    response = await llm.ainvoke([_PLAN_SYS_MSG] + state["messages"])
+    cities = []
+    for line in response.content.splitlines():
+        city = line.strip(" -*\t")
+        if city and city.upper() != "NONE" and city not in cities:
+            cities.append(city)
+    return {"cities": cities}
+
+def route_cities(state: MyMessagesState):
+    """Fan out one city_pipeline per city; fall back to the tool loop if none were found."""
+    if not state.get("cities"):
+        return "tool_calling_llm"
+    return [Send("city_pipeline", {"city": c}) for c in state["cities"]]
+
+# city_pipeline: geocode -> current_weather -> format, run in parallel per city
+async def city_pipeline(state: CityState):
+    try:
+        loc = await geocode_city(state["city"])
+        payload = await current_weather(loc["lat"], loc["lon"])
+        line = format_weather_summary(loc["city"], payload)
+    except Exception as exc:
+        line = f"{state['city']}: lookup failed ({exc})"
+    return {"city_reports": [line]}
+
 # tool_calling_llm: call the LLM with the tools
-def tool_calling_llm(state: MyMessagesState):
-    system = SystemMessage(content=(
-        "You are a helpful weather assistant. "
-        "When the user mentions cities, call geocode_city for each city, then call current_weather. "
-        "Prefer Celsius unless the user explicitly requests Fahrenheit/imperial."
-    ))
-    
+async def tool_calling_llm(state: MyMessagesState):
     # prompt the LLM with the system message and the messages in the state
-    prompt = [system] + state["messages"]
-    response = llm_with_tools.invoke(prompt)
+    prompt = [_TOOL_SYS_MSG] + state["messages"]
+    response = await llm_with_tools.ainvoke(prompt)
     
     return {"messages": [response]}
 
-def compose_final_answer(state: MyMessagesState):
-    system = SystemMessage(content=(
-        "Summarize any fetched weather results in plain language. "
-        "Output one line per city, with condition, temperature, and wind. "
-        "If any city failed, acknowledge it clearly instead of guessing."
-    ))
-    response = llm.invoke([system] + state["messages"])
+async def compose_final_answer(state: MyMessagesState):
+    prompt = [_COMPOSE_SYS_MSG] + state["messages"]
+    if state.get("city_reports"):
+        prompt.append(SystemMessage(content="Fetched weather results:\n" + "\n".join(state["city_reports"])))
+    response = await llm.ainvoke(prompt)
     return {"messages": [response]}
 
 # --- Graph Construction ---
 # construct the graph with the nodes and edges
-# 1. three nodes: tool_calling_llm, tools, compose_final
-# 2. four edges: 
-#   START -> tool_calling_llm
+# 1. five nodes: plan_cities, city_pipeline, tool_calling_llm, tools, compose_final
+# 2. edges:
+#   START -> plan_cities
+#   plan_cities -> city_pipeline (one Send per city, run in parallel)
+#   plan_cities -> tool_calling_llm (fallback when no city was found)
+#   city_pipeline -> compose_final (fan-in once every branch has finished)
 #   tool_calling_llm -> tools (conditional edge)
 #   tools -> tool_calling_llm (cyclic loop)
 #   compose_final -> END
 builder = StateGraph(MyMessagesState)
 
 # node 1
+builder.add_node("plan_cities", plan_cities)
+builder.add_node("city_pipeline", city_pipeline)
 builder.add_node("tool_calling_llm", tool_calling_llm)
-builder.add_node("tools", ToolNode([geocode_city, current_weather]))
+builder.add_node("tools", ToolNode(WEATHER_TOOLS))
 builder.add_node("compose_final", compose_final_answer)
 
-builder.add_edge(START, "tool_calling_llm")
+builder.add_edge(START, "plan_cities")
+builder.add_conditional_edges(
+    "plan_cities",
+    route_cities,
+    ["city_pipeline", "tool_calling_llm"]
+)
+builder.add_edge("city_pipeline", "compose_final")
 builder.add_conditional_edges(
     "tool_calling_llm",
     tools_condition,
@@ -147,18 +268,32 @@ builder.add_edge("compose_final", END)
 graph = builder.compile()
 
 # --- Visualization Helpers ---
+GRAPH_CACHE_DIR = project_dir / ".cache"
+
 def visualize_graph():
     """
     Print graph structure in ASCII and Mermaid (for markdown).
     If graphviz is available, also render a PNG.
+    Rendered text is cached per graph structure, so repeat runs skip the layout.
     """
     g = graph.get_graph()
+    structure = repr(sorted(g.nodes)) + repr(sorted((e.source, e.target, e.conditional) for e in g.edges))
+    graph_hash = hashlib.blake2b(structure.encode()).hexdigest()[:12]
+    cache_file = GRAPH_CACHE_DIR / f"graph_{graph_hash}.txt"
+    if cache_file.exists():
+        print(cache_file.read_text(encoding="utf-8"))
+        return
 
-    print("\n--- Graph (ASCII) ---")
-    print(g.draw_ascii())
-
-    print("\n--- Graph (Mermaid) ---")
-    print(g.draw_mermaid())
+    text = (
+        "\n--- Graph (ASCII) ---\n" + g.draw_ascii()
+        + "\n\n--- Graph (Mermaid) ---\n" + g.draw_mermaid()
+    )
+    print(text)
+    try:
+        GRAPH_CACHE_DIR.mkdir(exist_ok=True)
+        cache_file.write_text(text, encoding="utf-8")
+    except OSError:
+        pass
 
     # Optional: render PNG if graphviz is installed
     try:
@@ -178,7 +313,7 @@ def run_case(prompt: str, title: str):
     
     # initilize the graph with the initial state
     state = MyMessagesState(messages=[HumanMessage(content=prompt)])
-    result = graph.invoke(state) # invoke the graph with the initial state
+    result = asyncio.run(graph.ainvoke(state)) # invoke the graph with the initial state
     
     for m in result["messages"]:
         if isinstance(m, AIMessage) and not m.tool_calls:
@@ -186,4 +321,5 @@ def run_case(prompt: str, title: str):
 
 if __name__ == "__main__":
     run_case("Weather in Paris and London please.", "Test: Multi-city request")
-    #visualize_graph()
\ No newline at end of file
+    if "--viz" in sys.argv:
+        visualize_graph()
\ No newline at end of file
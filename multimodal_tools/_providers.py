@@ -0,0 +1,27 @@
+"""
+Provider selection shared by the multimodal tools.
+"""
+
+import os
+from typing import Optional, Sequence, Tuple
+
+
+class AutoProvider:
+    """Resolves provider="auto" from the first credential set in the environment.
+
+    Each tool keeps its own priority list of (environment variable, provider)
+    pairs. The choice is made once and then reused; a miss is re-checked on the
+    next call, so keys loaded later are still seen.
+    """
+
+    def __init__(self, priority: Sequence[Tuple[str, str]]):
+        self._priority = tuple(priority)
+        self._provider: Optional[str] = None
+
+    def resolve(self) -> Optional[str]:
+        """Return the auto provider, or None if no credentials are configured."""
+        if self._provider is None:
+            self._provider = next(
+                (provider for env_var, provider in self._priority if os.getenv(env_var)), None
+            )
+        return self._provider
@@ -1,7 +1,7 @@
 """Audio processing tools."""
 
-from .speech_to_text import speech_to_text
+from .speech_to_text import speech_to_text, speech_to_text_whisper_batch
 from .text_to_speech import text_to_speech
 
-__all__ = ["speech_to_text", "text_to_speech"]
+__all__ = ["speech_to_text", "speech_to_text_whisper_batch", "text_to_speech"]
 
@@ -7,12 +7,25 @@ Supports multiple STT providers:
 3. Local Whisper (for privacy)
 """
 
+import asyncio
+import functools
+import mmap
 import os
-import sys
-from typing import Optional
+from typing import List, Optional
 
-# Add parent directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from .._providers import AutoProvider
+
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    """Return a shared OpenAI client per API key so its connection pool is reused."""
+    import openai
+    return openai.OpenAI(api_key=api_key)
+
+@functools.lru_cache(maxsize=1)
+def _stt_client():
+    """Return a shared Google SpeechClient so every call reuses one gRPC channel."""
+    from google.cloud import speech
+    return speech.SpeechClient()
 
 def speech_to_text_whisper(audio_path: str, language: Optional[str] = None) -> str:
     """Transcribe audio using OpenAI Whisper API."""
@@ -35,7 +48,7 @@ def speech_to_text_whisper(audio_path: str, language: Optional[str] = None) -> s
         return f"❌ Error: Audio file not found: {audio_path}"
     
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
         with open(audio_path, "rb") as audio_file:
             transcript = client.audio.transcriptions.create(
@@ -50,6 +63,64 @@ def speech_to_text_whisper(audio_path: str, language: Optional[str] = None) -> s
     except Exception as e:
         return f"❌ Error transcribing audio: {str(e)}"
 
+# Google's limits are by duration: recognize() takes up to 60 s of audio and
+# streaming_recognize() about 305 s. Sizes assume the LINEAR16 / 16 kHz mono
+# config below, i.e. 32000 bytes per second.
+GOOGLE_BYTES_PER_SECOND = 16000 * 2
+GOOGLE_SYNC_MAX_SECONDS = 60
+GOOGLE_STREAMING_MAX_SECONDS = 305
+# Audio above this size is streamed to Google in chunks instead of one RPC
+GOOGLE_STREAMING_THRESHOLD = GOOGLE_SYNC_MAX_SECONDS * GOOGLE_BYTES_PER_SECOND
+GOOGLE_STREAM_CHUNK = 1 << 16
+
+def _chunk_requests(speech, mm: mmap.mmap):
+    """Yield StreamingRecognizeRequests over a memory-mapped audio file."""
+    for start in range(0, len(mm), GOOGLE_STREAM_CHUNK):
+        yield speech.StreamingRecognizeRequest(audio_content=mm[start:start + GOOGLE_STREAM_CHUNK])
+
+# Upper bound on concurrent Whisper uploads in a batch
+WHISPER_BATCH_CONCURRENCY = 8
+
+async def speech_to_text_whisper_batch(audio_paths: List[str], language: Optional[str] = None) -> List[str]:
+    """
+    Transcribe several audio files with Whisper concurrently.
+    
+    Args:
+        audio_paths: Paths to audio files (local file paths)
+        language: Language code (optional, e.g., "en", "es", "fr")
+    
+    Returns:
+        One transcript (or error message) per input path, in the same order
+    """
+    try:
+        import openai
+    except ImportError:
+        return ["❌ Whisper requires openai library.\nInstall with: pip install openai"] * len(audio_paths)
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return ["❌ OPENAI_API_KEY not set."] * len(audio_paths)
+    
+    limit = asyncio.Semaphore(WHISPER_BATCH_CONCURRENCY)
+    
+    async def transcribe(client, path: str) -> str:
+        if not os.path.exists(path):
+            return f"❌ Error: Audio file not found: {path}"
+        try:
+            async with limit:
+                with open(path, "rb") as audio_file:
+                    return await client.audio.transcriptions.create(
+                        model="whisper-1",
+                        file=audio_file,
+                        language=language,
+                        response_format="text"
+                    )
+        except Exception as e:
+            return f"❌ Error transcribing audio: {str(e)}"
+    
+    async with openai.AsyncOpenAI(api_key=api_key) as client:
+        return list(await asyncio.gather(*(transcribe(client, p) for p in audio_paths)))
+
 def speech_to_text_google(audio_path: str, language: str = "en-US") -> str:
     """Transcribe audio using Google Speech-to-Text API."""
     try:
@@ -64,18 +135,38 @@ def speech_to_text_google(audio_path: str, language: str = "en-US") -> str:
         return f"❌ Error: Audio file not found: {audio_path}"
     
     try:
-        client = speech.SpeechClient()
-        
-        with open(audio_path, "rb") as audio_file:
-            content = audio_file.read()
+        client = _stt_client()
         
-        audio = speech.RecognitionAudio(content=content)
         config = speech.RecognitionConfig(
             encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
             sample_rate_hertz=16000,
             language_code=language,
         )
         
+        # Map the file instead of reading it into a bytes object first
+        with open(audio_path, "rb") as audio_file, \
+                mmap.mmap(audio_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            duration = len(mm) / GOOGLE_BYTES_PER_SECOND
+            if duration > GOOGLE_STREAMING_MAX_SECONDS:
+                return (
+                    f"❌ Audio is too long for Google STT (~{duration:.0f} s; "
+                    f"max {GOOGLE_STREAMING_MAX_SECONDS} s). Split the file or use provider='whisper'."
+                )
+            if len(mm) > GOOGLE_STREAMING_THRESHOLD:
+                responses = client.streaming_recognize(
+                    config=speech.StreamingRecognitionConfig(config=config),
+                    requests=_chunk_requests(speech, mm),
+                )
+                transcript = " ".join(
+                    result.alternatives[0].transcript
+                    for response in responses
+                    for result in response.results
+                    if result.is_final and result.alternatives
+                )
+                return transcript or "❌ No transcription results found."
+            
+            audio = speech.RecognitionAudio(content=bytes(mm))
+        
         response = client.recognize(config=config, audio=audio)
         
         if response.results:
@@ -86,6 +177,12 @@ def speech_to_text_google(audio_path: str, language: str = "en-US") -> str:
     except Exception as e:
         return f"❌ Error transcribing with Google STT: {str(e)}"
 
+# Priority: Google first (for consistency with Google ADK), then OpenAI
+_AUTO_PROVIDER = AutoProvider((
+    ("GOOGLE_APPLICATION_CREDENTIALS", "google"),
+    ("OPENAI_API_KEY", "whisper"),
+))
+
 def speech_to_text(audio_path: str, provider: str = "auto", language: Optional[str] = None) -> str:
     """
     Transcribe an audio file to text.
@@ -103,13 +200,9 @@ def speech_to_text(audio_path: str, provider: str = "auto", language: Optional[s
         "Hello, this is a transcription..."
     """
     # Auto-select provider
-    # Priority: Google Speech-to-Text first (for consistency with Google ADK), then OpenAI
     if provider == "auto":
-        if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-            provider = "google"
-        elif os.getenv("OPENAI_API_KEY"):
-            provider = "whisper"
-        else:
+        provider = _AUTO_PROVIDER.resolve()
+        if provider is None:
             return (
                 "❌ No speech-to-text API key found.\n"
                 "Please set one of:\n"
@@ -7,19 +7,67 @@ Supports multiple TTS providers:
 3. ElevenLabs (premium quality, optional)
 """
 
-import os
-import sys
+import functools
 import hashlib
-from typing import Optional
+import os
+import threading
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from .._providers import AutoProvider
 
 # Create output directory for generated audio
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "generated_audio"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    """Return a shared OpenAI client per API key so its connection pool is reused."""
+    import openai
+    return openai.OpenAI(api_key=api_key)
+
+@functools.lru_cache(maxsize=1)
+def _tts_client():
+    """Return a shared Google TextToSpeechClient so every call reuses one gRPC channel."""
+    from google.cloud import texttospeech
+    return texttospeech.TextToSpeechClient()
+
+def _audio_path(prefix: str, text: str, voice: str) -> Path:
+    """Deterministic output path for a (text, voice) pair, used as an on-disk cache key."""
+    # 128-bit digest: the name doubles as the cache key, so a collision would
+    # silently return another text's audio
+    text_hash = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return OUTPUT_DIR / f"{prefix}_{text_hash}_{voice}.mp3"
+
+def _success_message(text: str, voice: str, filepath: Path, cached: bool = False) -> str:
+    """Format the result message returned by the TTS providers."""
+    return (
+        f"✅ Audio generated successfully!{' (cached)' if cached else ''}\n"
+        f"- Text: {text[:50]}...\n"
+        f"- Voice: {voice}\n"
+        f"- Saved to: {filepath}"
+    )
+
+def _is_cached(filepath: Path) -> bool:
+    """True if a non-empty audio file was already generated for this key."""
+    try:
+        return filepath.stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+def _part_path(filepath: Path) -> Path:
+    """Per-thread temp path, so concurrent writers of one key never share a file."""
+    return filepath.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+
+def _write_atomic(filepath: Path, data: bytes) -> None:
+    """Write via a temp file so a failed write never leaves a partial cache entry."""
+    tmp = _part_path(filepath)
+    try:
+        tmp.write_bytes(data)
+        tmp.replace(filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
 def text_to_speech_openai(text: str, voice: str = "alloy") -> str:
     """Generate speech using OpenAI TTS API."""
     try:
@@ -42,29 +90,29 @@ def text_to_speech_openai(text: str, voice: str = "alloy") -> str:
     if voice not in valid_voices:
         voice = "alloy"
     
+    filepath = _audio_path("tts", text, voice)
+    if _is_cached(filepath):
+        return _success_message(text, voice, filepath, cached=True)
+    
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
-        response = client.audio.speech.create(
-            model="tts-1",  # or "tts-1-hd" for higher quality
-            voice=voice,
-            input=text
-        )
+        # Stream the audio to disk instead of buffering the whole MP3; the temp file
+        # is only renamed into place once complete, so _is_cached never sees a partial one
+        tmp = _part_path(filepath)
+        try:
+            with client.audio.speech.with_streaming_response.create(
+                model="tts-1",  # or "tts-1-hd" for higher quality
+                voice=voice,
+                input=text
+            ) as response:
+                response.stream_to_file(tmp, chunk_size=1 << 20)
+            tmp.replace(filepath)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
         
-        # Generate filename
-        text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-        filename = f"tts_{text_hash}_{voice}.mp3"
-        filepath = OUTPUT_DIR / filename
-        
-        # Save audio file
-        response.stream_to_file(filepath)
-        
-        return (
-            f"✅ Audio generated successfully!\n"
-            f"- Text: {text[:50]}...\n"
-            f"- Voice: {voice}\n"
-            f"- Saved to: {filepath}"
-        )
+        return _success_message(text, voice, filepath)
         
     except Exception as e:
         return f"❌ Error generating speech: {str(e)}"
@@ -79,8 +127,12 @@ def text_to_speech_google(text: str, voice: str = "en-US-Standard-D") -> str:
             "Install with: pip install google-cloud-texttospeech"
         )
     
+    filepath = _audio_path("tts_google", text, voice)
+    if _is_cached(filepath):
+        return _success_message(text, voice, filepath, cached=True)
+    
     try:
-        client = texttospeech.TextToSpeechClient()
+        client = _tts_client()
         
         synthesis_input = texttospeech.SynthesisInput(text=text)
         voice_config = texttospeech.VoiceSelectionParams(
@@ -98,25 +150,22 @@ def text_to_speech_google(text: str, voice: str = "en-US-Standard-D") -> str:
             audio_config=audio_config
         )
         
-        # Generate filename
-        text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-        filename = f"tts_google_{text_hash}.mp3"
-        filepath = OUTPUT_DIR / filename
-        
         # Save audio file
-        with open(filepath, "wb") as out:
-            out.write(response.audio_content)
+        _write_atomic(filepath, response.audio_content)
         
-        return (
-            f"✅ Audio generated successfully!\n"
-            f"- Text: {text[:50]}...\n"
-            f"- Voice: {voice}\n"
-            f"- Saved to: {filepath}"
-        )
+        return _success_message(text, voice, filepath)
         
     except Exception as e:
         return f"❌ Error generating speech with Google TTS: {str(e)}"
 
+_DEFAULT_VOICES = {"google": "en-US-Standard-D", "openai": "alloy"}
+
+# Priority: Google first (for consistency with Google ADK), then OpenAI
+_AUTO_PROVIDER = AutoProvider((
+    ("GOOGLE_APPLICATION_CREDENTIALS", "google"),
+    ("OPENAI_API_KEY", "openai"),
+))
+
 def text_to_speech(text: str, voice: str = "default", provider: str = "auto") -> str:
     """
     Generate speech audio from text.
@@ -136,17 +185,9 @@ def text_to_speech(text: str, voice: str = "default", provider: str = "auto") ->
         "✅ Audio generated successfully!..."
     """
     # Auto-select provider
-    # Priority: Google TTS first (for consistency with Google ADK), then OpenAI
     if provider == "auto":
-        if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-            provider = "google"
-            if voice == "default":
-                voice = "en-US-Standard-D"
-        elif os.getenv("OPENAI_API_KEY"):
-            provider = "openai"
-            if voice == "default":
-                voice = "alloy"
-        else:
+        provider = _AUTO_PROVIDER.resolve()
+        if provider is None:
             return (
                 "❌ No text-to-speech API key found.\n"
                 "Please set one of:\n"
@@ -163,6 +204,9 @@ def text_to_speech(text: str, voice: str = "default", provider: str = "auto") ->
                 "2. Set OPENAI_API_KEY in your .env file"
             )
     
+    if voice == "default":
+        voice = _DEFAULT_VOICES.get(provider, voice)
+    
     # Route to appropriate provider
     if provider == "openai":
         return text_to_speech_openai(text, voice)
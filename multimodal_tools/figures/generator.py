@@ -7,40 +7,32 @@ Supports multiple diagram types:
 3. PlantUML (future enhancement)
 """
 
+# Static scaffolds around the single description slot of each diagram
+_FLOWCHART_PRE = "```mermaid\nflowchart TD\n  A[Start] --> B["
+_FLOWCHART_POST = "]\n  B --> C[Process]\n  C --> D[Result]\n```"
+_SEQUENCE_PRE = (
+    "```mermaid\n"
+    "sequenceDiagram\n"
+    "    participant User\n"
+    "    participant System\n"
+    "    User->>System: Request\n"
+    "    System->>System: "
+)
+_SEQUENCE_POST = "\n    System-->>User: Response\n```"
+_CLASS_PRE = "```mermaid\nclassDiagram\n    class MainClass {\n        +"
+_CLASS_POST = "\n    }\n```"
+
 def generate_flowchart_mermaid(description: str) -> str:
     """Generate a Mermaid flowchart."""
-    return (
-        "```mermaid\n"
-        "flowchart TD\n"
-        f"  A[Start] --> B[{description}]\n"
-        "  B --> C[Process]\n"
-        "  C --> D[Result]\n"
-        "```"
-    )
+    return _FLOWCHART_PRE + description + _FLOWCHART_POST
 
 def generate_sequence_mermaid(description: str) -> str:
     """Generate a Mermaid sequence diagram."""
-    return (
-        "```mermaid\n"
-        "sequenceDiagram\n"
-        "    participant User\n"
-        "    participant System\n"
-        "    User->>System: Request\n"
-        f"    System->>System: {description}\n"
-        "    System-->>User: Response\n"
-        "```"
-    )
+    return _SEQUENCE_PRE + description + _SEQUENCE_POST
 
 def generate_class_mermaid(description: str) -> str:
     """Generate a Mermaid class diagram."""
-    return (
-        "```mermaid\n"
-        "classDiagram\n"
-        "    class MainClass {\n"
-        f"        +{description}\n"
-        "    }\n"
-        "```"
-    )
+    return _CLASS_PRE + description + _CLASS_POST
 
 def generate_figure(description: str, format: str = "mermaid", diagram_type: str = "flowchart") -> str:
     """
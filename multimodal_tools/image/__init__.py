@@ -1,7 +1,7 @@
 """Image processing tools."""
 
-from .generation import generate_image
+from .generation import generate_image, generate_images, generate_images_threaded
 from .analysis import analyze_image
 
-__all__ = ["generate_image", "analyze_image"]
+__all__ = ["generate_image", "generate_images", "generate_images_threaded", "analyze_image"]
 
@@ -6,13 +6,9 @@ No additional API keys needed - uses the same GEMINI_API_KEY.
 """
 
 import os
-import sys
 from typing import Optional
 from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
-
 try:
     import google.generativeai as genai
     from PIL import Image
@@ -20,6 +16,45 @@ try:
 except ImportError:
     HAS_PIL = False
 
+# Remote images larger than this are rejected instead of buffered
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+_http_session = None
+
+def _get_http_session():
+    """Return a shared requests.Session so image downloads reuse connections."""
+    global _http_session
+    if _http_session is None:
+        import requests
+        _http_session = requests.Session()
+    return _http_session
+
+def _download_image(url: str):
+    """Stream an image from a URL into PIL, reading at most MAX_IMAGE_BYTES."""
+    from io import BytesIO
+    with _get_http_session().get(url, stream=True, timeout=10) as response:
+        response.raise_for_status()
+        length = response.headers.get("Content-Length")
+        if length and int(length) > MAX_IMAGE_BYTES:
+            raise ValueError(f"Image is too large ({int(length)} bytes, limit {MAX_IMAGE_BYTES})")
+        response.raw.decode_content = True
+        data = response.raw.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError(f"Image is too large (limit {MAX_IMAGE_BYTES} bytes)")
+    img = Image.open(BytesIO(data))
+    img.load()
+    return img
+
+# Vision models to try, best first; instances are created once and reused
+VISION_MODEL_NAMES = ("gemini-1.5-pro", "gemini-1.5-flash", "gemini-pro-vision")
+_vision_models = None
+
+def _get_vision_models():
+    """Return the shared GenerativeModel instances for VISION_MODEL_NAMES."""
+    global _vision_models
+    if _vision_models is None:
+        _vision_models = [(name, genai.GenerativeModel(name)) for name in VISION_MODEL_NAMES]
+    return _vision_models
+
 def analyze_image(image_path: str, question: Optional[str] = None) -> str:
     """
     Analyze an image using Gemini's vision capabilities.
@@ -51,10 +86,7 @@ def analyze_image(image_path: str, question: Optional[str] = None) -> str:
     try:
         # Load image
         if image_path.startswith(("http://", "https://")):
-            import requests
-            from io import BytesIO
-            response = requests.get(image_path)
-            img = Image.open(BytesIO(response.content))
+            img = _download_image(image_path)
         else:
             img = Image.open(image_path)
         
@@ -73,12 +105,9 @@ Provide a comprehensive analysis focusing on people and their activities."""
         
         # Use Gemini's vision model
         # Try gemini-1.5-pro first (best vision), fallback to gemini-pro-vision
-        vision_models = ["gemini-1.5-pro", "gemini-1.5-flash", "gemini-pro-vision"]
-        
         last_error = None
-        for model_name in vision_models:
+        for model_name, model in _get_vision_models():
             try:
-                model = genai.GenerativeModel(model_name)
                 response = model.generate_content([prompt, img])
                 
                 if hasattr(response, 'text') and response.text:
@@ -12,23 +12,189 @@ Set environment variables:
 - STABILITY_API_KEY for Stability AI
 """
 
+import asyncio
+import functools
+import importlib
 import os
-import sys
 import hashlib
-from typing import Optional
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from .._providers import AutoProvider
 
-# Create output directory for generated images
+# Output directory for generated images (created on first save, not at import)
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "generated_images"
-OUTPUT_DIR.mkdir(exist_ok=True)
+
+@functools.lru_cache(maxsize=1)
+def _ensure_output_dir() -> Path:
+    """Create OUTPUT_DIR on first use."""
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    return OUTPUT_DIR
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+DALLE_MODEL = "dall-e-3"
+IMAGEN_MODEL = "imagegeneration@006"
+
+@functools.lru_cache(maxsize=None)
+def _lazy(name: str):
+    """Import a module on first use and cache it (raises ImportError if missing)."""
+    return importlib.import_module(name)
+
+_IMAGEN_MISSING_MSG = (
+    "❌ Google Imagen requires Vertex AI libraries.\n"
+    "Install with: pip install google-cloud-aiplatform\n"
+    "\n"
+    "See GOOGLE_SERVICES_SETUP.md for complete setup instructions.\n"
+    "\n"
+    "Alternative: Use DALL-E (easier setup, just needs OPENAI_API_KEY)"
+)
+_VERTEX_MISSING_MSG = (
+    "❌ Google Imagen requires Vertex AI libraries.\n"
+    "Install with: pip install google-cloud-aiplatform\n"
+    "\n"
+    "See GOOGLE_SERVICES_SETUP.md for complete setup instructions.\n"
+    "\n"
+    "Quick setup:\n"
+    "1. pip install google-cloud-aiplatform\n"
+    "2. gcloud auth application-default login\n"
+    "3. Set GOOGLE_CLOUD_PROJECT in .env\n"
+    "4. Enable Vertex AI API in Google Cloud Console\n"
+    "\n"
+    "Alternative: Use DALL-E (easier setup, just needs OPENAI_API_KEY)"
+)
+
+@functools.lru_cache(maxsize=1)
+def _resolve_imagen():
+    """
+    Resolve the Imagen SDK imports once.
+    
+    Returns (aiplatform, ImageGenerationModel or None, error message or None).
+    ImageGenerationModel is None when only the generative models SDK is present.
+    """
+    try:
+        aiplatform = _lazy("google.cloud.aiplatform")
+    except ImportError:
+        return None, None, _IMAGEN_MISSING_MSG
+    try:
+        return aiplatform, _lazy("vertexai.preview.vision_models").ImageGenerationModel, None
+    except (ImportError, AttributeError):
+        pass
+    try:
+        _lazy("vertexai.preview.generative_models")
+    except ImportError:
+        return None, None, _VERTEX_MISSING_MSG
+    return aiplatform, None, None
+
+@functools.lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    """Return a shared OpenAI client per API key so its connection pool is reused."""
+    return _lazy("openai").OpenAI(api_key=api_key, timeout=60.0, max_retries=2)
+
+_session = None
+
+def _get_session():
+    """Return a shared keep-alive requests.Session for image downloads."""
+    global _session
+    if _session is None:
+        requests = _lazy("requests")
+        Retry = _lazy("urllib3.util.retry").Retry
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        )
+        _session = requests.Session()
+        _session.mount("https://", adapter)
+    return _session
+
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+def _slug(value: str) -> str:
+    """Filesystem-safe lowercase form of a size/style label."""
+    return _SLUG_RE.sub("_", value.lower()).strip("_")
+
+@functools.lru_cache(maxsize=1024)
+def _cache_path(provider: str, model: str, prompt: str, style: str, size: str) -> Path:
+    """Content-addressed output path for a generation request, used as an on-disk cache key."""
+    key = hashlib.blake2b("|".join((provider, model, prompt, style, size)).encode("utf-8"), digest_size=16).hexdigest()
+    return _ensure_output_dir() / f"{provider}_{_slug(size)}_{_slug(style)}_{key}.png"
+
+@functools.lru_cache(maxsize=1024)
+def _enhanced_prompt(prompt: str, style: str) -> str:
+    """Prompt sent to the provider: the user prompt plus style hints."""
+    return f"{prompt}, {style} style, high quality"
+
+def _is_cached(filepath: Path) -> bool:
+    """True if a non-empty image was already generated for this key."""
+    try:
+        return filepath.stat().st_size > 0
+    except FileNotFoundError:
+        return False
+
+def _part_path(filepath: Path) -> Path:
+    """Per-thread temp path, so concurrent writers of one key never share a file."""
+    return filepath.with_suffix(f".{os.getpid()}.{threading.get_ident()}.part")
+
+def _write_atomic(filepath: Path, data: bytes) -> None:
+    """Write via a temp file so a failed write never leaves a partial cache entry."""
+    tmp = _part_path(filepath)
+    try:
+        tmp.write_bytes(data)
+        tmp.replace(filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def _download_atomic(url: str, filepath: Path) -> None:
+    """Stream a URL straight to disk, via a temp file, without buffering the body."""
+    tmp = _part_path(filepath)
+    try:
+        with _get_session().get(url, timeout=(5, 30), stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Providers already return encoded PNGs, so bytes are saved as-is (no PIL
+            # decode/re-encode); only the signature is checked to fail fast on junk.
+            head = response.raw.read(len(PNG_SIGNATURE))
+            if head != PNG_SIGNATURE:
+                raise ValueError(f"Unexpected response format (expected PNG, got {head[:8]!r})")
+            # A 1 MiB buffer coalesces the 64 KiB chunks into a couple of write() calls
+            with open(tmp, "wb", buffering=1 << 20) as f:
+                f.write(head)
+                shutil.copyfileobj(response.raw, f, length=64 * 1024)
+        tmp.replace(filepath)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def _cached_message(prompt: str, style: str, filepath: Path) -> str:
+    """Result message for a request served from the on-disk cache."""
+    return (
+        f"✅ Image generated successfully!\n"
+        f"- Prompt: {prompt}\n"
+        f"- Style: {style}\n"
+        f"- Saved to: {filepath}\n"
+        f"- Cached: reused a previously generated image"
+    )
+
+def _dalle_message(prompt: str, style: str, filepath: Path, image_url: str) -> str:
+    """Result message for a freshly generated DALL-E image."""
+    return (
+        f"✅ Image generated successfully!\n"
+        f"- Prompt: {prompt}\n"
+        f"- Style: {style}\n"
+        f"- Saved to: {filepath}\n"
+        f"- URL: {image_url}"
+    )
 
 def generate_image_dalle(prompt: str, style: str = "realistic", size: str = "1024x1024") -> str:
     """Generate image using OpenAI DALL-E API."""
     try:
-        import openai
+        _lazy("openai")
     except ImportError:
         return (
             "❌ DALL-E requires openai library.\n"
@@ -42,14 +208,18 @@ def generate_image_dalle(prompt: str, style: str = "realistic", size: str = "102
             "Get your key from: https://platform.openai.com/api-keys"
         )
     
+    filepath = _cache_path("dalle", DALLE_MODEL, prompt, style, size)
+    if _is_cached(filepath):
+        return _cached_message(prompt, style, filepath)
+    
     try:
-        client = openai.OpenAI(api_key=api_key)
+        client = _openai_client(api_key)
         
         # Enhance prompt with style
-        enhanced_prompt = f"{prompt}, {style} style, high quality"
+        enhanced_prompt = _enhanced_prompt(prompt, style)
         
         response = client.images.generate(
-            model="dall-e-3",
+            model=DALLE_MODEL,
             prompt=enhanced_prompt,
             n=1,
             size=size,
@@ -59,75 +229,41 @@ def generate_image_dalle(prompt: str, style: str = "realistic", size: str = "102
         image_url = response.data[0].url
         
         # Download and save image
-        import requests
-        img_response = requests.get(image_url)
+        _download_atomic(image_url, filepath)
         
-        # Generate filename
-        prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:8]
-        filename = f"dalle_{prompt_hash}.png"
-        filepath = OUTPUT_DIR / filename
-        
-        with open(filepath, "wb") as f:
-            f.write(img_response.content)
-        
-        return (
-            f"✅ Image generated successfully!\n"
-            f"- Prompt: {prompt}\n"
-            f"- Style: {style}\n"
-            f"- Saved to: {filepath}\n"
-            f"- URL: {image_url}"
-        )
+        return _dalle_message(prompt, style, filepath, image_url)
         
     except Exception as e:
         return f"❌ Error generating image with DALL-E: {str(e)}"
 
+_GCLOUD_ADC_PATH = os.path.expanduser("~/.config/gcloud/application_default_credentials.json")
+_google_creds_found = False
+
+def _has_google_credentials() -> bool:
+    """True once Google credentials are found; a hit is remembered for the process lifetime."""
+    global _google_creds_found
+    if not _google_creds_found:
+        _google_creds_found = bool(
+            os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or os.path.exists(_GCLOUD_ADC_PATH)
+        )
+    return _google_creds_found
+
+# Vertex AI setup is done once per (project, location); loaded models are reused
+_vertex_inited: set = set()
+_imagen_models: dict = {}  # (project, location, model name) -> ImageGenerationModel
+
 def generate_image_imagen(prompt: str, style: str = "realistic") -> str:
     """
     Generate image using Google Imagen API (Vertex AI).
     
     Note: Imagen requires Vertex AI setup. See GOOGLE_SERVICES_SETUP.md for details.
     """
-    try:
-        from google.cloud import aiplatform
-        try:
-            from vertexai.preview.vision_models import ImageGenerationModel
-        except ImportError:
-            # Try alternative import path
-            try:
-                from vertexai.preview import generative_models
-                ImageGenerationModel = None  # Will use alternative approach
-            except ImportError:
-                return (
-                    "❌ Google Imagen requires Vertex AI libraries.\n"
-                    "Install with: pip install google-cloud-aiplatform\n"
-                    "\n"
-                    "See GOOGLE_SERVICES_SETUP.md for complete setup instructions.\n"
-                    "\n"
-                    "Quick setup:\n"
-                    "1. pip install google-cloud-aiplatform\n"
-                    "2. gcloud auth application-default login\n"
-                    "3. Set GOOGLE_CLOUD_PROJECT in .env\n"
-                    "4. Enable Vertex AI API in Google Cloud Console\n"
-                    "\n"
-                    "Alternative: Use DALL-E (easier setup, just needs OPENAI_API_KEY)"
-                )
-    except ImportError:
-        return (
-            "❌ Google Imagen requires Vertex AI libraries.\n"
-            "Install with: pip install google-cloud-aiplatform\n"
-            "\n"
-            "See GOOGLE_SERVICES_SETUP.md for complete setup instructions.\n"
-            "\n"
-            "Alternative: Use DALL-E (easier setup, just needs OPENAI_API_KEY)"
-        )
+    aiplatform, ImageGenerationModel, import_error = _resolve_imagen()
+    if import_error:
+        return import_error
     
     # Check for credentials
-    has_creds = (
-        os.getenv("GOOGLE_APPLICATION_CREDENTIALS") or
-        os.path.exists(os.path.expanduser("~/.config/gcloud/application_default_credentials.json"))
-    )
-    
-    if not has_creds:
+    if not _has_google_credentials():
         return (
             "❌ Google Cloud credentials not found.\n"
             "Set up authentication:\n"
@@ -156,12 +292,22 @@ def generate_image_imagen(prompt: str, style: str = "realistic") -> str:
                 "Alternative: Use DALL-E (easier setup, just needs OPENAI_API_KEY)"
             )
         
-        aiplatform.init(project=project_id, location=location)
+        filepath = _cache_path("imagen", IMAGEN_MODEL, prompt, style, "1:1")
+        if _is_cached(filepath):
+            return _cached_message(prompt, style, filepath)
+        
+        vertex_key = (project_id, location)
+        if vertex_key not in _vertex_inited:
+            aiplatform.init(project=project_id, location=location)
+            _vertex_inited.add(vertex_key)
         
         # Try to use Imagen model
         try:
             if ImageGenerationModel:
-                model = ImageGenerationModel.from_pretrained("imagegeneration@006")
+                model_key = (project_id, location, IMAGEN_MODEL)
+                model = _imagen_models.get(model_key)
+                if model is None:
+                    model = _imagen_models[model_key] = ImageGenerationModel.from_pretrained(IMAGEN_MODEL)
             else:
                 # Alternative: Use REST API or different approach
                 # For now, provide helpful error
@@ -182,7 +328,7 @@ def generate_image_imagen(prompt: str, style: str = "realistic") -> str:
                 )
             
             # Enhance prompt with style
-            enhanced_prompt = f"{prompt}, {style} style, high quality"
+            enhanced_prompt = _enhanced_prompt(prompt, style)
             
             # Generate image
             response = model.generate_images(
@@ -196,12 +342,7 @@ def generate_image_imagen(prompt: str, style: str = "realistic") -> str:
             image_bytes = generated_image.image_bytes
             
             # Save image
-            prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:8]
-            filename = f"imagen_{prompt_hash}.png"
-            filepath = OUTPUT_DIR / filename
-            
-            with open(filepath, "wb") as f:
-                f.write(image_bytes)
+            _write_atomic(filepath, image_bytes)
             
             return (
                 f"✅ Image generated successfully with Google Imagen!\n"
@@ -244,7 +385,7 @@ def generate_image_imagen(prompt: str, style: str = "realistic") -> str:
 def generate_image_stability(prompt: str, style: str = "realistic") -> str:
     """Generate image using Stability AI API."""
     try:
-        import requests
+        _lazy("requests")
     except ImportError:
         return "❌ requests library required for Stability AI"
     
@@ -258,6 +399,20 @@ def generate_image_stability(prompt: str, style: str = "realistic") -> str:
     # Implementation would go here
     return "⚠️ Stability AI integration coming soon. Using DALL-E for now."
 
+# Routing table for generate_image
+_PROVIDERS: Dict[str, Callable[[str, str], str]] = {
+    "dalle": generate_image_dalle,
+    "imagen": generate_image_imagen,
+    "stability": generate_image_stability,
+}
+
+# Priority: Google Imagen first (for consistency with Google ADK), then others
+_AUTO_PROVIDER = AutoProvider((
+    ("GOOGLE_APPLICATION_CREDENTIALS", "imagen"),
+    ("OPENAI_API_KEY", "dalle"),
+    ("STABILITY_API_KEY", "stability"),
+))
+
 def generate_image(prompt: str, style: str = "realistic", provider: str = "auto") -> str:
     """
     Generate an image based on a prompt and style.
@@ -275,15 +430,9 @@ def generate_image(prompt: str, style: str = "realistic", provider: str = "auto"
         "✅ Image generated successfully!..."
     """
     # Auto-select provider based on available API keys
-    # Priority: Google Imagen first (for consistency with Google ADK), then others
     if provider == "auto":
-        if os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-            provider = "imagen"
-        elif os.getenv("OPENAI_API_KEY"):
-            provider = "dalle"
-        elif os.getenv("STABILITY_API_KEY"):
-            provider = "stability"
-        else:
+        provider = _AUTO_PROVIDER.resolve()
+        if provider is None:
             return (
                 "❌ No image generation API key found.\n"
                 "Please set one of:\n"
@@ -302,12 +451,100 @@ def generate_image(prompt: str, style: str = "realistic", provider: str = "auto"
             )
     
     # Route to appropriate provider
-    if provider == "dalle":
-        return generate_image_dalle(prompt, style)
-    elif provider == "imagen":
-        return generate_image_imagen(prompt, style)
-    elif provider == "stability":
-        return generate_image_stability(prompt, style)
-    else:
+    fn = _PROVIDERS.get(provider)
+    if fn is None:
         return f"❌ Unknown provider: {provider}. Use 'dalle', 'imagen', or 'stability'"
+    return fn(prompt, style)
+
+async def _generate_image_dalle_async(client, prompt: str, style: str, size: str) -> str:
+    """Async DALL-E generation on a shared AsyncOpenAI client."""
+    filepath = _cache_path("dalle", DALLE_MODEL, prompt, style, size)
+    if _is_cached(filepath):
+        return _cached_message(prompt, style, filepath)
+    
+    try:
+        response = await client.images.generate(
+            model=DALLE_MODEL,
+            prompt=_enhanced_prompt(prompt, style),
+            n=1,
+            size=size,
+            quality="standard"
+        )
+        image_url = response.data[0].url
+        
+        # The pooled requests session is reused for the download, off the event loop
+        await asyncio.to_thread(_download_atomic, image_url, filepath)
+        
+        return _dalle_message(prompt, style, filepath, image_url)
+    
+    except Exception as e:
+        return f"❌ Error generating image with DALL-E: {str(e)}"
+
+async def generate_images(
+    prompts: List[str],
+    style: str = "realistic",
+    provider: str = "auto",
+    max_concurrency: int = 8,
+) -> List[str]:
+    """
+    Generate several images concurrently.
+    
+    Args:
+        prompts: Image descriptions/prompts
+        style: Style applied to every prompt
+        provider: Image generation provider ("dalle", "imagen", "stability", or "auto")
+        max_concurrency: Maximum number of generations in flight at once
+    
+    Returns:
+        One result message per prompt, in the same order
+    """
+    if provider == "auto":
+        # Resolve once for the whole batch; fall through to generate_image's message if unset
+        provider = _AUTO_PROVIDER.resolve() or provider
+    limit = asyncio.Semaphore(max_concurrency)
+    
+    async def generate_all(client) -> List[str]:
+        async def one(prompt: str) -> str:
+            async with limit:
+                if client is not None:
+                    return await _generate_image_dalle_async(client, prompt, style, "1024x1024")
+                # Other providers only have sync clients: run them in worker threads
+                return await asyncio.to_thread(generate_image, prompt, style, provider)
+        # Identical prompts in one batch share a single generation
+        unique = list(dict.fromkeys(prompts))
+        results = dict(zip(unique, await asyncio.gather(*(one(p) for p in unique))))
+        return [results[p] for p in prompts]
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if provider == "dalle" and api_key:
+        try:
+            openai = _lazy("openai")
+        except ImportError:
+            return await generate_all(None)
+        async with openai.AsyncOpenAI(api_key=api_key) as client:
+            return await generate_all(client)
+    return await generate_all(None)
 
+def generate_images_threaded(
+    prompts: List[str],
+    style: str = "realistic",
+    provider: str = "auto",
+    max_workers: int = 8,
+) -> List[str]:
+    """
+    Generate several images concurrently on a thread pool.
+    
+    Sync counterpart of generate_images for callers without an event loop
+    (scripts, notebooks); generation and downloads are I/O-bound and release the GIL.
+    
+    Args:
+        prompts: Image descriptions/prompts
+        style: Style applied to every prompt
+        provider: Image generation provider ("dalle", "imagen", "stability", or "auto")
+        max_workers: Maximum number of generations in flight at once
+    
+    Returns:
+        One result message per prompt, in the same order
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda p: generate_image(p, style, provider), prompts))
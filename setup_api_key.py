@@ -8,6 +8,15 @@ This script helps you configure your API key for the Google ADK agents.
 import os
 import sys
 
+def _find_env_value(env_file, key):
+    """Return the value of the first KEY= line in env_file, reading only up to that line."""
+    prefix = key + '='
+    with open(env_file, 'r', buffering=4096) as f:
+        for line in iter(f.readline, ''):
+            if line.startswith(prefix):
+                return line[len(prefix):].strip()
+    return None
+
 def setup_api_key():
     """Interactive script to set up the API key."""
     
@@ -23,23 +32,14 @@ def setup_api_key():
     if os.path.exists(env_file):
         print(f"✅ Found .env file at: {env_file}")
         
-        # Read current content
-        with open(env_file, 'r') as f:
-            content = f.read()
-        
         # Check if API key is already set (not placeholder)
-        if 'GEMINI_API_KEY=' in content:
-            lines = content.split('\n')
-            for line in lines:
-                if line.startswith('GEMINI_API_KEY='):
-                    current_key = line.split('=', 1)[1].strip()
-                    if current_key and current_key != 'your_api_key_here':
-                        print(f"⚠️  API key is already set (starts with: {current_key[:4]}...)")
-                        response = input("Do you want to update it? (y/n): ").strip().lower()
-                        if response != 'y':
-                            print("Keeping existing API key.")
-                            return
-                    break
+        current_key = _find_env_value(env_file, 'GEMINI_API_KEY')
+        if current_key and current_key != 'your_api_key_here':
+            print(f"⚠️  API key is already set (starts with: {current_key[:4]}...)")
+            response = input("Do you want to update it? (y/n): ").strip().lower()
+            if response != 'y':
+                print("Keeping existing API key.")
+                return
     else:
         print(f"📝 Creating new .env file at: {env_file}")
     
@@ -4,30 +4,52 @@ FastAPI Backend for Super Personal Agent
 This provides a REST API interface for your personal AI assistant.
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, BackgroundTasks, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
+import asyncio
+import itertools
 import os
+import secrets
 import sys
-import uuid
 from pathlib import Path
-import shutil
 import json
+import mimetypes
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
 
 # Add parent directory to path to import agent
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from examples.multimodal_agent import MultimodalAgent
 
+# orjson (optional) serializes responses and history lines several times faster
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+    _loads = orjson.loads
+except ImportError:
+    DefaultResponse = JSONResponse
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+    _loads = json.loads
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Orel AI API",
     description="REST API for Orel - Superintelligent AI Assistant with advanced multimodal capabilities",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=DefaultResponse
 )
 
 # CORS middleware to allow frontend to connect
@@ -39,9 +61,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def new_id() -> str:
+    """Random 128-bit id as 32 hex chars (one os.urandom call, no UUID object)."""
+    return secrets.token_hex(16)
+
 # Initialize agent (singleton)
 agent = None
-current_conversation_id = str(uuid.uuid4())  # Initialize with a conversation ID
+current_conversation_id = new_id()  # Initialize with a conversation ID
 
 def get_agent():
     """Get or create the agent instance."""
@@ -89,12 +115,43 @@ def get_agent():
             raise HTTPException(status_code=500, detail=f"Failed to initialize agent: {str(e)}")
     return agent
 
+# Blocking agent/STT/TTS calls run on a bounded pool so the event loop stays free
+BLOCKING_WORKERS = 8
+# The agent keeps a single chat history, so runs are serialized even off the loop
+_agent_lock = threading.Lock()
+
+def run_agent(agent: MultimodalAgent, *args, **kwargs) -> str:
+    """Call agent.run while holding the agent lock (runs in a worker thread)."""
+    with _agent_lock:
+        return agent.run(*args, **kwargs)
+
+# multimodal_tools package, imported once (see get_tools)
+_mm_tools = None
+
+def get_tools():
+    """Return the multimodal_tools package, importing it on first use."""
+    global _mm_tools
+    if _mm_tools is None:
+        import multimodal_tools
+        _mm_tools = multimodal_tools
+    return _mm_tools
+
+@app.on_event("startup")
+async def _startup():
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=BLOCKING_WORKERS))
+    # Pay for the tool imports and agent construction before the first request, not during it
+    try:
+        await asyncio.to_thread(get_tools)
+        await asyncio.to_thread(get_agent)
+    except Exception as e:
+        print(f"⚠️ Warm-up failed, will retry on first request: {e}")
+
 def reset_agent_conversation():
     """Reset the agent's conversation history (start new conversation)."""
     global agent, current_conversation_id
     if agent:
         agent.history = []
-    current_conversation_id = str(uuid.uuid4())
+    current_conversation_id = new_id()
     return current_conversation_id
 
 # Request/Response models
@@ -131,44 +188,317 @@ class TTSResponse(BaseModel):
     audio_path: Optional[str] = None
     audio_url: Optional[str] = None
 
+# Tool results report their output file as "Saved to: <path>"
+SAVED_TO_RE = re.compile(r'Saved to:[ \t]*(.+)')
+
+# Verbose per-request logging, off unless DEBUG=1
+DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
+# backend/main.py -> super_personal_agent/ (APP_DIR) -> agents_development/ (BASE_DIR)
+APP_DIR = Path(__file__).parent.parent
+BASE_DIR = APP_DIR.parent
+
+# Directories /api/files/ may serve from; a generated file's parent must be one of them
+ALLOWED_SERVE_ROOTS = frozenset({BASE_DIR / "generated_images", BASE_DIR / "generated_audio"})
+
 # Upload directories
-UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+UPLOAD_DIR = APP_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 UPLOAD_DIR_IMAGES = UPLOAD_DIR / "images"
 UPLOAD_DIR_AUDIO = UPLOAD_DIR / "audio"
 UPLOAD_DIR_IMAGES.mkdir(exist_ok=True)
 UPLOAD_DIR_AUDIO.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+async def save_upload(upload: UploadFile, dest: Path) -> int:
+    """Copy an upload to dest in chunks without blocking the event loop; returns bytes written."""
+    written = 0
+    out = await asyncio.to_thread(open, dest, "wb")
+    try:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"File too large (limit {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+            await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        out.close()
+        dest.unlink(missing_ok=True)
+        raise
+    out.close()
+    return written
 
 # Conversation history storage
-HISTORY_DIR = Path(__file__).parent.parent / "conversation_history"
+# History is an append-only JSONL log: a chat turn appends one line instead of
+# rewriting the whole file, and deletes append a tombstone line. The log is
+# compacted in the background once it overshoots HISTORY_MAX_ENTRIES or
+# accumulates too many dead lines.
+HISTORY_DIR = APP_DIR / "conversation_history"
 HISTORY_DIR.mkdir(exist_ok=True)
-HISTORY_FILE = HISTORY_DIR / "conversations.json"
+HISTORY_FILE = HISTORY_DIR / "conversations.jsonl"
+LEGACY_HISTORY_FILE = HISTORY_DIR / "conversations.json"
+HISTORY_MAX_ENTRIES = 1000
+HISTORY_COMPACT_SLACK = 100  # extra lines tolerated before a compaction runs
+HISTORY_MAX_DEAD_RATIO = 0.2  # compact once this share of lines is deleted/tombstones
+TOMBSTONE = "tombstone"
+_history_lock = threading.Lock()
+_history_count = 0  # lines in HISTORY_FILE, kept in step with every write
+_tombstones = 0  # tombstone lines in HISTORY_FILE
+_offsets: Dict[str, int] = {}  # live entry id -> byte offset of its line
+_recent_history = deque(maxlen=HISTORY_MAX_ENTRIES)  # newest live entries, oldest first
+_compaction_pending = False
+
+# Aggregates behind /api/stats and /api/conversations/sessions, updated on every
+# write so those endpoints never re-read the log (guarded by _history_lock)
+def _empty_stats() -> Dict:
+    """Fresh, empty history aggregates."""
+    return {"by_date": Counter(), "sessions": {}, "session_ids": set(), "oldest": None, "newest": None}
+
+_stats = _empty_stats()
+_history_version = 0  # bumped on every change to _stats; keys response caches
+
+def _record_stats(entry: Dict):
+    """Fold one entry into _stats (caller holds _history_lock)."""
+    global _history_version
+    _history_version += 1
+    timestamp = entry.get("timestamp")
+    _stats["by_date"][(timestamp or "")[:10]] += 1
+    if _stats["oldest"] is None:
+        _stats["oldest"] = timestamp
+    _stats["newest"] = timestamp
+    conv_id = entry.get("conversation_id", "unknown")
+    if entry.get("conversation_id"):
+        _stats["session_ids"].add(conv_id)
+    # Re-insert so "sessions" stays ordered by last message, oldest first
+    # (entries arrive in timestamp order), and listing it never needs a sort
+    session = _stats["sessions"].pop(conv_id, None)
+    if session is None:
+        session = {
+            "conversation_id": conv_id,
+            "message_count": 0,
+            "first_message": timestamp,
+            "last_message": timestamp,
+        }
+    session["message_count"] += 1
+    session["last_message"] = timestamp
+    _stats["sessions"][conv_id] = session
+
+def _forget_stats(entry: Dict):
+    """Take one deleted entry back out of _stats (caller holds _history_lock).
+
+    Bounds that depended on the entry are re-derived from _recent_history,
+    which by then no longer holds it; the next compaction recomputes
+    everything exactly.
+    """
+    global _history_version
+    _history_version += 1
+    timestamp = entry.get("timestamp")
+    date = (timestamp or "")[:10]
+    _stats["by_date"][date] -= 1
+    if _stats["by_date"][date] <= 0:
+        del _stats["by_date"][date]
+    if timestamp == _stats["newest"]:
+        _stats["newest"] = _recent_history[-1].get("timestamp") if _recent_history else None
+    if timestamp == _stats["oldest"] and len(_recent_history) == len(_offsets):
+        # The window holds every live entry, so its first one is the oldest
+        _stats["oldest"] = _recent_history[0].get("timestamp") if _recent_history else None
+    conv_id = entry.get("conversation_id", "unknown")
+    session = _stats["sessions"].get(conv_id)
+    if session is None:
+        return
+    session["message_count"] -= 1
+    if session["message_count"] <= 0:
+        del _stats["sessions"][conv_id]
+        _stats["session_ids"].discard(conv_id)
+    elif timestamp in (session["first_message"], session["last_message"]):
+        remaining = [e.get("timestamp") for e in _recent_history
+                     if e.get("conversation_id", "unknown") == conv_id]
+        if remaining:
+            session["last_message"] = remaining[-1]
+            if timestamp == session["first_message"] and len(remaining) == session["message_count"]:
+                session["first_message"] = remaining[0]
+
+def _rebuild_stats(entries: List[Dict]):
+    """Recompute _stats from scratch after the log is rewritten (caller holds _history_lock)."""
+    global _stats, _history_version
+    _history_version += 1
+    _stats = _empty_stats()
+    for entry in entries:
+        _record_stats(entry)
+
+def _scan_log() -> List[Dict]:
+    """Read the log, apply tombstones and rebuild the offset index (caller holds _history_lock)."""
+    global _history_count, _tombstones
+    live: Dict[str, Dict] = {}
+    offsets: Dict[str, int] = {}
+    lines = tombstones = 0
+    with open(HISTORY_FILE, 'rb') as f:
+        while True:
+            pos = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            lines += 1
+            try:
+                record = _loads(line)
+            except json.JSONDecodeError:
+                continue  # torn write from a crash; skip the line
+            if record.get("type") == TOMBSTONE:
+                tombstones += 1
+                live.pop(record.get("id"), None)
+                offsets.pop(record.get("id"), None)
+            else:
+                key = record.get("id") or f"@{pos}"
+                live[key] = record
+                offsets[key] = pos
+    _history_count, _tombstones = lines, tombstones
+    _offsets.clear()
+    _offsets.update(offsets)
+    return list(live.values())
+
+def _reset_recent(entries: List[Dict]):
+    """Refill the in-memory window from live entries (caller holds _history_lock)."""
+    _recent_history.clear()
+    _recent_history.extend(entries)  # maxlen keeps only the newest
+
+def _write_entries(entries: List[Dict]):
+    """Atomically replace the history log with entries (caller holds _history_lock)."""
+    global _history_count, _tombstones
+    tmp = HISTORY_FILE.with_suffix('.jsonl.tmp')
+    offsets: Dict[str, int] = {}
+    pos = 0
+    with open(tmp, 'wb') as f:
+        for entry in entries:
+            line = _dumps(entry).encode('utf-8') + b"\n"
+            offsets[entry.get("id") or f"@{pos}"] = pos
+            f.write(line)
+            pos += len(line)
+    os.replace(tmp, HISTORY_FILE)
+    _history_count, _tombstones = len(entries), 0
+    _offsets.clear()
+    _offsets.update(offsets)
+    _reset_recent(entries)
+    _rebuild_stats(entries)
+
+def _migrate_legacy_history():
+    """Convert the old single-JSON-array conversations.json to the JSONL log once."""
+    if LEGACY_HISTORY_FILE.exists() and not HISTORY_FILE.exists():
+        try:
+            with open(LEGACY_HISTORY_FILE, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            with _history_lock:
+                _write_entries(entries[-HISTORY_MAX_ENTRIES:])
+            print(f"✅ Migrated {len(entries)} conversations to {HISTORY_FILE}")
+        except Exception as e:
+            print(f"⚠️ Could not migrate {LEGACY_HISTORY_FILE}: {e}")
+
+def _index_history():
+    """Scan the log once at startup; afterwards the index and aggregates are maintained."""
+    if not HISTORY_FILE.exists():
+        return
+    with _history_lock:
+        entries = _scan_log()
+        _reset_recent(entries)
+        _rebuild_stats(entries)
+
+_migrate_legacy_history()
+_index_history()
 
 # Load conversation history
 def load_history() -> List[Dict]:
-    """Load conversation history from file."""
-    if HISTORY_FILE.exists():
-        try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+    """Return the newest HISTORY_MAX_ENTRIES conversations, oldest first (served from memory)."""
+    with _history_lock:
+        return list(_recent_history)
+
+def read_entry(entry_id: str) -> Optional[Dict]:
+    """Read one live entry by id with a single seek + readline."""
+    with _history_lock:
+        pos = _offsets.get(entry_id)
+        if pos is None:
+            return None
+        with open(HISTORY_FILE, 'rb') as f:
+            f.seek(pos)
+            return _loads(f.readline())
 
 # Save conversation history
 def save_history(history: List[Dict]):
-    """Save conversation history to file."""
+    """Rewrite the whole history file (clearing only; chat turns use append_entry)."""
     try:
         # Ensure directory exists
         HISTORY_DIR.mkdir(exist_ok=True)
-        with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+        with _history_lock:
+            _write_entries(history)
         print(f"✅ Saved {len(history)} conversations to {HISTORY_FILE}")
     except Exception as e:
         print(f"❌ Error saving history: {e}")
         import traceback
         traceback.print_exc()
 
+def _append_line(record: Dict) -> int:
+    """Append one record to the log and return its byte offset (caller holds _history_lock)."""
+    global _history_count
+    with open(HISTORY_FILE, 'ab') as f:
+        pos = f.tell()
+        f.write(_dumps(record).encode('utf-8') + b"\n")
+    _history_count += 1
+    return pos
+
+def append_entry(entry: Dict):
+    """Append a single entry to the history log."""
+    HISTORY_DIR.mkdir(exist_ok=True)
+    with _history_lock:
+        _offsets[entry["id"]] = _append_line(entry)
+        _recent_history.append(entry)  # evicts the oldest past the cap
+        _record_stats(entry)
+
+def delete_entry(entry_id: str) -> bool:
+    """Delete an entry by appending a tombstone; returns False if it does not exist."""
+    global _tombstones
+    with _history_lock:
+        pos = _offsets.get(entry_id)
+        if pos is None:
+            return False
+        entry = next((e for e in _recent_history if e.get("id") == entry_id), None)
+        if entry is None:
+            # Older than the in-memory window: one seek + readline
+            with open(HISTORY_FILE, 'rb') as f:
+                f.seek(pos)
+                entry = _loads(f.readline())
+        _append_line({"type": TOMBSTONE, "id": entry_id})
+        _tombstones += 1
+        # Update the index, window and aggregates in place; _compact_history
+        # does the full rescan (and refills the window) later
+        del _offsets[entry_id]
+        try:
+            _recent_history.remove(entry)
+        except ValueError:
+            pass
+        _forget_stats(entry)
+        return True
+
+def _compact_history():
+    """Rewrite the log with only the newest HISTORY_MAX_ENTRIES live entries."""
+    global _compaction_pending
+    try:
+        with _history_lock:
+            _write_entries(_scan_log()[-HISTORY_MAX_ENTRIES:])
+    except Exception as e:
+        print(f"❌ Error compacting history: {e}")
+    finally:
+        _compaction_pending = False
+
+def _maybe_compact():
+    """Start a background compaction if the log has overshot the cap or holds too many dead lines."""
+    global _compaction_pending
+    dead = _history_count - len(_offsets)
+    too_long = _history_count > HISTORY_MAX_ENTRIES + HISTORY_COMPACT_SLACK
+    too_dead = _tombstones and dead > HISTORY_MAX_DEAD_RATIO * _history_count
+    if (too_long or too_dead) and not _compaction_pending:
+        _compaction_pending = True
+        threading.Thread(target=_compact_history, daemon=True).start()
+
 # Add conversation entry
 def add_conversation_entry(user_message: str, agent_response: str, image_path: Optional[str] = None, conversation_id: Optional[str] = None):
     """Add a conversation entry to history."""
@@ -177,25 +507,32 @@ def add_conversation_entry(user_message: str, agent_response: str, image_path: O
     # Use provided conversation_id or current one
     if conversation_id is None:
         if current_conversation_id is None:
-            current_conversation_id = str(uuid.uuid4())
+            current_conversation_id = new_id()
         conversation_id = current_conversation_id
     
-    history = load_history()
     entry = {
-        "id": str(uuid.uuid4()),
+        "id": new_id(),
         "conversation_id": conversation_id,  # Group messages by conversation
         "timestamp": datetime.now().isoformat(),
         "user_message": user_message,
         "agent_response": agent_response,
         "image_path": image_path
     }
-    history.append(entry)
-    # Keep only last 1000 conversations
-    if len(history) > 1000:
-        history = history[-1000:]
-    save_history(history)
+    append_entry(entry)
+    # Keep only last 1000 conversations (compacted off the request path)
+    _maybe_compact()
     return entry
 
+def save_conversation_entry(user_message: str, agent_response: str, image_path: Optional[str] = None, conversation_id: Optional[str] = None):
+    """Add a conversation entry, logging instead of raising (runs as a background task)."""
+    try:
+        entry = add_conversation_entry(user_message, agent_response, image_path, conversation_id)
+        print(f"✅ Conversation saved: {entry.get('id', 'unknown')}")
+    except Exception as e:
+        print(f"⚠️ Warning: Failed to save conversation: {e}")
+        import traceback
+        traceback.print_exc()
+
 # API Routes
 @app.get("/")
 async def root():
@@ -229,8 +566,11 @@ async def list_routes():
     return {"routes": routes}
 
 # Agent-controlled camera capture
+# Capture requests are pushed to the frontend over /ws/camera as soon as they are queued.
 agent_camera_enabled = False
-camera_capture_queue = []
+CAMERA_QUEUE_MAX = 32  # pending captures kept if no frontend is listening
+camera_capture_queue: asyncio.Queue = asyncio.Queue(maxsize=CAMERA_QUEUE_MAX)
+recent_captures = deque(maxlen=5)  # shown by /api/agent/camera-status
 
 @app.post("/api/agent/capture-photo")
 async def agent_capture_photo():
@@ -238,7 +578,7 @@ async def agent_capture_photo():
     Agent requests to capture a photo from the camera.
     Returns a signal that the frontend should capture a photo.
     """
-    global agent_camera_enabled, camera_capture_queue
+    global agent_camera_enabled
     
     if not agent_camera_enabled:
         return {
@@ -247,11 +587,19 @@ async def agent_capture_photo():
         }
     
     # Add capture request to queue
-    capture_id = str(uuid.uuid4())
-    camera_capture_queue.append({
+    capture_id = new_id()
+    capture = {
         "id": capture_id,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    try:
+        camera_capture_queue.put_nowait(capture)
+    except asyncio.QueueFull:
+        return DefaultResponse(status_code=429, content={
+            "status": "throttled",
+            "message": f"{CAMERA_QUEUE_MAX} captures are already pending; is the camera page open?"
+        })
+    recent_captures.append(capture)
     
     return {
         "status": "success",
@@ -262,12 +610,12 @@ async def agent_capture_photo():
 @app.get("/api/agent/camera-status")
 async def get_camera_status():
     """Get current camera status and any pending captures."""
-    global agent_camera_enabled, camera_capture_queue
+    global agent_camera_enabled
     
     return {
         "enabled": agent_camera_enabled,
-        "pending_captures": len(camera_capture_queue),
-        "queue": camera_capture_queue[-5:] if camera_capture_queue else []  # Last 5 requests
+        "pending_captures": camera_capture_queue.qsize(),
+        "queue": list(recent_captures)  # Last 5 requests
     }
 
 class CameraControlRequest(BaseModel):
@@ -284,21 +632,27 @@ async def enable_agent_camera(request: CameraControlRequest):
         "message": f"Agent camera control {'enabled' if agent_camera_enabled else 'disabled'}"
     }
 
-@app.get("/api/agent/poll-capture")
-async def poll_capture():
-    """Frontend polls this to check if agent requested a capture."""
-    global camera_capture_queue
-    
-    if camera_capture_queue:
-        capture = camera_capture_queue.pop(0)
-        return {
-            "status": "capture_requested",
-            "capture_id": capture["id"]
-        }
-    
-    return {
-        "status": "no_capture"
-    }
+@app.websocket("/ws/camera")
+async def camera_socket(websocket: WebSocket):
+    """Push agent capture requests to the frontend the moment they are queued."""
+    await websocket.accept()
+    try:
+        while True:
+            capture = await camera_capture_queue.get()
+            try:
+                await websocket.send_json({
+                    "status": "capture_requested",
+                    "capture_id": capture["id"]
+                })
+            except Exception:
+                # Client went away mid-send: leave the request for the next connection
+                try:
+                    camera_capture_queue.put_nowait(capture)
+                except asyncio.QueueFull:
+                    pass
+                raise
+    except (WebSocketDisconnect, RuntimeError):
+        pass
 
 @app.post("/api/agent/capture-complete")
 async def capture_complete(capture_id: str, image_path: str):
@@ -310,8 +664,54 @@ async def capture_complete(capture_id: str, image_path: str):
         "message": "Capture completed, ready for analysis"
     }
 
+def resolve_image_path(image_path: Optional[str]) -> Optional[str]:
+    """
+    Find an uploaded image with a single stat call.
+    
+    Accepts the canonical "images/<id>.<ext>" path returned by /api/upload/image,
+    a bare filename, or an absolute path.
+    """
+    if not image_path:
+        return None
+    if os.path.isabs(image_path):
+        path = Path(image_path)
+    else:
+        path = UPLOAD_DIR_IMAGES / image_path.removeprefix("images/")
+    if path.is_file():
+        return str(path)
+    
+    print(f"[Chat] Warning: Image not found: {image_path}")
+    return None
+
+async def stream_agent(agent: MultimodalAgent, text: str, image_path: Optional[str] = None) -> AsyncIterator[str]:
+    """Run agent.stream in a worker thread and yield its chunks on the event loop."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            with _agent_lock:
+                for chunk in agent.stream(text, image_path=image_path):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    # The producer runs to completion even if the client disconnects, so the agent
+    # lock is always released and the agent history stays consistent
+    loop.run_in_executor(None, produce)
+    while True:
+        item = await queue.get()
+        if item is done:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
 @app.post("/api/chat", response_model=TextResponse)
-async def chat(request: TextRequest):
+async def chat(request: TextRequest, background: BackgroundTasks):
     """
     Chat with the agent (text only or text + image).
     
@@ -325,28 +725,12 @@ async def chat(request: TextRequest):
         print("[Chat] Agent retrieved successfully")
         
         # Handle image if provided
-        image_path = None
-        if request.image_path:
-            # Try different path formats
-            possible_paths = [
-                UPLOAD_DIR_IMAGES / request.image_path,
-                UPLOAD_DIR / request.image_path,
-                Path(request.image_path)  # Absolute path
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    image_path = str(path)
-                    print(f"[Chat] Found image at: {image_path}")
-                    break
-            
-            if not image_path:
-                print(f"[Chat] Warning: Image not found. Tried paths: {possible_paths}")
+        image_path = resolve_image_path(request.image_path)
         
         # Get response from agent
         print(f"[Chat] Calling agent.run()...")
         try:
-        response = agent.run(request.text, image_path=image_path)
+            response = await asyncio.to_thread(run_agent, agent, request.text, image_path=image_path)
             print(f"[Chat] Agent response received, length: {len(response) if response else 0}")
         except Exception as agent_error:
             print(f"[Chat] Error in agent.run(): {agent_error}")
@@ -362,20 +746,8 @@ async def chat(request: TextRequest):
             print("[Chat] Warning: Agent returned empty response")
             response = "I received your message but couldn't generate a response. Please try again or check the console for errors."
         
-        # Save to conversation history
-        try:
-            entry = add_conversation_entry(
-                user_message=request.text,
-                agent_response=response,
-                image_path=request.image_path,
-                conversation_id=current_conversation_id
-            )
-            print(f"✅ Conversation saved: {entry.get('id', 'unknown')}")
-        except Exception as e:
-            print(f"⚠️ Warning: Failed to save conversation: {e}")
-            import traceback
-            traceback.print_exc()
-            # Don't fail the request if saving fails
+        # Save to conversation history after the response is sent
+        background.add_task(save_conversation_entry, request.text, response, request.image_path, current_conversation_id)
         
         return TextResponse(response=response)
     
@@ -390,22 +762,79 @@ async def chat(request: TextRequest):
             detail=f"Error processing chat: {str(e)}. Check backend logs for full traceback."
         )
 
+@app.get("/api/chat/stream")
+async def chat_stream(text: str, image_path: Optional[str] = None):
+    """
+    Chat with the agent, streaming the response as Server-Sent Events.
+    
+    Each event is `{"token": ...}`; the last one is `{"done": true, "conversation_id": ...}`.
+    The exchange is saved to history once the stream completes.
+    """
+    agent = get_agent()
+    resolved_image = resolve_image_path(image_path)
+
+    async def events():
+        chunks = []
+        try:
+            async for chunk in stream_agent(agent, text, resolved_image):
+                chunks.append(chunk)
+                yield f"data: {_dumps({'token': chunk})}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {_dumps({'error': str(e)})}\n\n"
+            return
+        # File I/O stays off the event loop
+        await asyncio.to_thread(save_conversation_entry, text, "".join(chunks), image_path, current_conversation_id)
+        yield f"data: {_dumps({'done': True, 'conversation_id': current_conversation_id})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/chat")
+async def chat_socket(websocket: WebSocket):
+    """
+    Chat over a WebSocket: send `{"text": ..., "image_path": ...}`, receive
+    `{"token": ...}` frames followed by `{"done": true, "response": ...}`.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            request = await websocket.receive_json()
+            text = request.get("text", "")
+            image_path = request.get("image_path")
+            chunks = []
+            try:
+                async for chunk in stream_agent(get_agent(), text, resolve_image_path(image_path)):
+                    chunks.append(chunk)
+                    await websocket.send_json({"token": chunk})
+            except (WebSocketDisconnect, RuntimeError):
+                raise
+            except Exception as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            response = "".join(chunks)
+            await asyncio.to_thread(save_conversation_entry, text, response, image_path, current_conversation_id)
+            await websocket.send_json({"done": True, "response": response, "conversation_id": current_conversation_id})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
 @app.post("/api/upload/image")
 async def upload_image(file: UploadFile = File(...)):
     """
     Upload an image file for analysis.
     
-    Returns the filename that can be used in chat requests.
+    Returns the canonical `path` (images/<id>.<ext>) to pass as `image_path` in chat requests.
     """
     try:
         # Generate unique filename
         file_ext = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        unique_filename = f"{new_id()}{file_ext}"
         file_path = UPLOAD_DIR_IMAGES / unique_filename
         
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await save_upload(file, file_path)
         
         return {
             "filename": unique_filename,
@@ -413,6 +842,8 @@ async def upload_image(file: UploadFile = File(...)):
             "message": "Image uploaded successfully"
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading image: {str(e)}")
 
@@ -426,12 +857,11 @@ async def upload_audio(file: UploadFile = File(...)):
     try:
         # Generate unique filename
         file_ext = Path(file.filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        unique_filename = f"{new_id()}{file_ext}"
         file_path = UPLOAD_DIR_AUDIO / unique_filename
         
         # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        await save_upload(file, file_path)
         
         return {
             "filename": unique_filename,
@@ -439,6 +869,8 @@ async def upload_audio(file: UploadFile = File(...)):
             "message": "Audio uploaded successfully"
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error uploading audio: {str(e)}")
 
@@ -451,9 +883,7 @@ async def generate_image(request: ImageGenerationRequest):
     - **style**: Image style (realistic, sketch, 3d, anime, etc.)
     """
     try:
-        from multimodal_tools import generate_image
-        
-        result = generate_image(request.prompt, request.style)
+        result = get_tools().generate_image(request.prompt, request.style)
         
         # Extract image path from result if available
         image_path = None
@@ -461,12 +891,11 @@ async def generate_image(request: ImageGenerationRequest):
         
         # Parse result message to extract file path
         if "Saved to:" in result:
-            import re
-            match = re.search(r'Saved to: (.+)', result)
+            match = SAVED_TO_RE.search(result)
             if match:
                 image_path = match.group(1)
                 # Create URL path
-                rel_path = Path(image_path).relative_to(Path(__file__).parent.parent.parent)
+                rel_path = Path(image_path).relative_to(BASE_DIR)
                 image_url = f"/api/files/{rel_path}"
         
         return ImageGenerationResponse(
@@ -487,14 +916,12 @@ async def transcribe_audio(request: AudioTranscriptionRequest):
     - **language**: Optional language code
     """
     try:
-        from multimodal_tools import speech_to_text
-        
         # Construct full path
         full_audio_path = UPLOAD_DIR_AUDIO / request.audio_path
         if not full_audio_path.exists():
             raise HTTPException(status_code=404, detail="Audio file not found")
         
-        transcript = speech_to_text(str(full_audio_path), language=request.language)
+        transcript = await asyncio.to_thread(get_tools().speech_to_text, str(full_audio_path), language=request.language)
         
         return AudioTranscriptionResponse(transcript=transcript)
     
@@ -510,9 +937,7 @@ async def text_to_speech(request: TTSRequest):
     - **voice**: Voice name (alloy, echo, fable, onyx, nova, shimmer for OpenAI)
     """
     try:
-        from multimodal_tools import text_to_speech
-        
-        result = text_to_speech(request.text, voice=request.voice)
+        result = await asyncio.to_thread(get_tools().text_to_speech, request.text, voice=request.voice)
         
         # Extract audio path from result if available
         audio_path = None
@@ -520,12 +945,11 @@ async def text_to_speech(request: TTSRequest):
         
         # Parse result message to extract file path
         if "Saved to:" in result:
-            import re
-            match = re.search(r'Saved to: (.+)', result)
+            match = SAVED_TO_RE.search(result)
             if match:
                 audio_path = match.group(1)
                 # Create URL path
-                rel_path = Path(audio_path).relative_to(Path(__file__).parent.parent.parent)
+                rel_path = Path(audio_path).relative_to(BASE_DIR)
                 audio_url = f"/api/files/{rel_path}"
         
         return TTSResponse(
@@ -539,6 +963,7 @@ async def text_to_speech(request: TTSRequest):
 
 @app.post("/api/chat-with-voice")
 async def chat_with_voice(
+    background: BackgroundTasks,
     audio: UploadFile = File(...),
     generate_audio: str = Form("true")
 ):
@@ -555,19 +980,16 @@ async def chat_with_voice(
         
         # Save uploaded audio
         file_ext = Path(audio.filename).suffix or ".webm"
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        unique_filename = f"{new_id()}{file_ext}"
         audio_path = UPLOAD_DIR_AUDIO / unique_filename
         
-        with open(audio_path, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
+        audio_size = await save_upload(audio, audio_path)
         
         # Step 1: Transcribe audio
-        from multimodal_tools import speech_to_text
-        
         print(f"[Voice Chat] Audio saved to: {audio_path}")
-        print(f"[Voice Chat] File size: {audio_path.stat().st_size} bytes")
+        print(f"[Voice Chat] File size: {audio_size} bytes")
         
-        transcript = speech_to_text(str(audio_path))
+        transcript = await asyncio.to_thread(get_tools().speech_to_text, str(audio_path))
         
         print(f"[Voice Chat] Transcript result: {transcript[:100] if transcript else 'None'}...")
         
@@ -591,51 +1013,38 @@ async def chat_with_voice(
             }
         
         # Step 2: Get agent response
-        response = agent.run(transcript)
+        response = await asyncio.to_thread(run_agent, agent, transcript)
         
-        # Save to conversation history
-        try:
-            add_conversation_entry(
-                user_message=transcript,
-                agent_response=response,
-                conversation_id=current_conversation_id
-            )
-        except Exception as e:
-            print(f"Warning: Failed to save conversation: {e}")
+        # Save to conversation history after the response is sent
+        background.add_task(save_conversation_entry, transcript, response, None, current_conversation_id)
         
         # Step 3: Generate TTS if requested
         audio_url = None
         generate_audio_bool = generate_audio.lower() in ("true", "1", "yes")
         if generate_audio_bool:
             try:
-                from multimodal_tools import text_to_speech
-                tts_result = text_to_speech(response, voice="alloy")
+                tts_result = await asyncio.to_thread(get_tools().text_to_speech, response, voice="alloy")
                 
                 print(f"[Voice Chat] TTS result: {tts_result[:200]}...")
                 
                 # Extract audio URL
                 if "Saved to:" in tts_result:
-                    import re
-                    match = re.search(r'Saved to: (.+)', tts_result)
+                    match = SAVED_TO_RE.search(tts_result)
                     if match:
                         tts_path_str = match.group(1).strip()
                         tts_path = Path(tts_path_str)
                         
-                        # Get base directory (agents_development)
-                        # backend/main.py -> super_personal_agent/backend/ -> super_personal_agent/ -> agents_development/
-                        base_dir = Path(__file__).parent.parent.parent
-                        
                         print(f"[Voice Chat] TTS path string: {tts_path_str}")
                         print(f"[Voice Chat] TTS path object: {tts_path}")
-                        print(f"[Voice Chat] Base dir: {base_dir}")
+                        print(f"[Voice Chat] Base dir: {BASE_DIR}")
                         print(f"[Voice Chat] TTS path is absolute: {tts_path.is_absolute()}")
                         print(f"[Voice Chat] File exists: {tts_path.exists()}")
                         
                         # Convert to relative path
                         try:
                             # Try relative_to if paths are compatible
-                            if tts_path.is_absolute() and str(tts_path).startswith(str(base_dir)):
-                                rel_path = tts_path.relative_to(base_dir)
+                            if tts_path.is_absolute() and str(tts_path).startswith(str(BASE_DIR)):
+                                rel_path = tts_path.relative_to(BASE_DIR)
                             else:
                                 # Extract just the filename and directory name
                                 if "generated_audio" in str(tts_path):
@@ -651,7 +1060,7 @@ async def chat_with_voice(
                             print(f"[Voice Chat] Relative path: {rel_path}")
                             
                             # Verify the file will be accessible
-                            full_serve_path = base_dir / rel_path
+                            full_serve_path = BASE_DIR / rel_path
                             print(f"[Voice Chat] Full serve path: {full_serve_path}")
                             print(f"[Voice Chat] Serve path exists: {full_serve_path.exists()}")
                             
@@ -676,6 +1085,8 @@ async def chat_with_voice(
             "status": "success"
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing voice chat: {str(e)}")
 
@@ -688,33 +1099,23 @@ async def serve_file(file_path: str):
     """
     try:
         # Construct full path
-        base_dir = Path(__file__).parent.parent.parent
-        full_path = base_dir / file_path
+        full_path = BASE_DIR / file_path
         
-        print(f"[File Serve] Requested path: {file_path}")
-        print(f"[File Serve] Base dir: {base_dir}")
-        print(f"[File Serve] Full path: {full_path}")
-        print(f"[File Serve] File exists: {full_path.exists()}")
+        if DEBUG:
+            print(f"[File Serve] Requested path: {file_path}")
+            print(f"[File Serve] Full path: {full_path}")
         
         # Security check - ensure file is within allowed directories
-        allowed_dirs = ["generated_images", "generated_audio"]
-        if not any(file_path.startswith(d) for d in allowed_dirs):
-            print(f"[File Serve] Access denied - path not in allowed dirs: {file_path}")
+        if full_path.parent not in ALLOWED_SERVE_ROOTS:
+            if DEBUG:
+                print(f"[File Serve] Access denied - path not in allowed dirs: {file_path}")
             raise HTTPException(status_code=403, detail="Access denied")
         
-        if not full_path.exists():
-            print(f"[File Serve] File not found: {full_path}")
+        if not full_path.is_file():
             raise HTTPException(status_code=404, detail=f"File not found: {file_path}")
         
-        # Determine content type
-        content_type = "application/octet-stream"
-        if file_path.endswith(".mp3"):
-            content_type = "audio/mpeg"
-        elif file_path.endswith(".png") or file_path.endswith(".jpg"):
-            content_type = "image/png" if file_path.endswith(".png") else "image/jpeg"
-        
-        print(f"[File Serve] Serving file with content-type: {content_type}")
-        return FileResponse(full_path, media_type=content_type)
+        content_type, _ = mimetypes.guess_type(file_path)
+        return FileResponse(full_path, media_type=content_type or "application/octet-stream")
     
     except HTTPException:
         raise
@@ -754,11 +1155,13 @@ async def get_conversations(limit: int = 100, offset: int = 0):
     - **offset**: Number of conversations to skip (default: 0)
     """
     try:
-        history = load_history()
-        # Return in reverse chronological order (newest first)
-        history.reverse()
-        total = len(history)
-        conversations = history[offset:offset + limit]
+        with _history_lock:
+            total = len(_recent_history)
+            # Newest first: the page is a slice counted back from the end of the window
+            start = max(0, total - max(0, offset) - max(0, limit))
+            stop = max(0, total - max(0, offset))
+            conversations = list(itertools.islice(_recent_history, start, stop))
+        conversations.reverse()
         return {
             "total": total,
             "offset": offset,
@@ -768,15 +1171,73 @@ async def get_conversations(limit: int = 100, offset: int = 0):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading conversations: {str(e)}")
 
+# (include_messages, limit, offset) -> (history version, payload) of recent sessions pages
+_sessions_cache: Dict[tuple, tuple] = {}
+SESSIONS_CACHE_MAX = 64
+
+def build_sessions_payload(include_messages: bool, limit: int, offset: int) -> Dict:
+    """Build (or reuse) one page of the sessions listing; runs in a worker thread."""
+    key = (include_messages, limit, offset)
+    cached = _sessions_cache.get(key)
+    if cached is not None and cached[0] == _history_version:
+        return cached[1]
+    
+    with _history_lock:
+        version = _history_version
+        total = len(_stats["sessions"])
+        # Newest first, straight from the insertion order of _stats["sessions"];
+        # only the requested page is copied
+        newest_first = reversed(_stats["sessions"].values())
+        sessions_list = [dict(session) for session in itertools.islice(newest_first, offset, offset + limit)]
+    
+    if include_messages:
+        by_session = {session["conversation_id"]: session for session in sessions_list}
+        for session in sessions_list:
+            session["messages"] = []
+        for entry in load_history():
+            session = by_session.get(entry.get("conversation_id", "unknown"))
+            if session is not None:
+                session["messages"].append(entry)
+    
+    payload = {
+        "total_sessions": total,
+        "offset": offset,
+        "limit": limit,
+        "sessions": sessions_list
+    }
+    if len(_sessions_cache) >= SESSIONS_CACHE_MAX:
+        _sessions_cache.clear()
+    _sessions_cache[key] = (version, payload)
+    return payload
+
+# Declared before /api/conversations/{conversation_id}, which would otherwise match "sessions"
+@app.get("/api/conversations/sessions")
+async def get_conversation_sessions(include_messages: bool = False, limit: int = 50, offset: int = 0):
+    """
+    Get conversation sessions (grouped conversations), newest first.
+    
+    - **include_messages**: Also return each session's messages
+    - **limit**: Number of sessions to return (default: 50)
+    - **offset**: Number of sessions to skip (default: 0)
+    """
+    try:
+        limit, offset = max(0, limit), max(0, offset)
+        cached = _sessions_cache.get((include_messages, limit, offset))
+        if cached is not None and cached[0] == _history_version:
+            return cached[1]
+        # Grouping up to HISTORY_MAX_ENTRIES messages is built off the event loop
+        return await asyncio.to_thread(build_sessions_payload, include_messages, limit, offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading sessions: {str(e)}")
+
 @app.get("/api/conversations/{conversation_id}")
 async def get_conversation(conversation_id: str):
     """Get a specific conversation by ID."""
     try:
-        history = load_history()
-        for entry in history:
-            if entry.get("id") == conversation_id:
-                return entry
-        raise HTTPException(status_code=404, detail="Conversation not found")
+        entry = read_entry(conversation_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        return entry
     except HTTPException:
         raise
     except Exception as e:
@@ -795,9 +1256,8 @@ async def clear_conversations():
 async def delete_conversation(conversation_id: str):
     """Delete a specific conversation."""
     try:
-        history = load_history()
-        history = [h for h in history if h.get("id") != conversation_id]
-        save_history(history)
+        delete_entry(conversation_id)
+        _maybe_compact()
         return {"message": "Conversation deleted", "status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting conversation: {str(e)}")
@@ -806,29 +1266,14 @@ async def delete_conversation(conversation_id: str):
 async def get_stats():
     """Get conversation statistics."""
     try:
-        history = load_history()
-        total_conversations = len(history)
-        
-        # Count unique conversation sessions
-        unique_sessions = set()
-        for entry in history:
-            conv_id = entry.get("conversation_id")
-            if conv_id:
-                unique_sessions.add(conv_id)
-        
-        # Count by date
-        by_date = {}
-        for entry in history:
-            date = entry.get("timestamp", "")[:10]  # Get date part
-            by_date[date] = by_date.get(date, 0) + 1
-        
-        return {
-            "total_conversations": total_conversations,
-            "unique_sessions": len(unique_sessions),
-            "conversations_by_date": by_date,
-            "oldest_conversation": history[0].get("timestamp") if history else None,
-            "newest_conversation": history[-1].get("timestamp") if history else None
-        }
+        with _history_lock:
+            return {
+                "total_conversations": len(_recent_history),
+                "unique_sessions": len(_stats["session_ids"]),
+                "conversations_by_date": dict(_stats["by_date"]),
+                "oldest_conversation": _stats["oldest"],
+                "newest_conversation": _stats["newest"]
+            }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading stats: {str(e)}")
 
@@ -845,40 +1290,19 @@ async def new_conversation():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting new conversation: {str(e)}")
 
-@app.get("/api/conversations/sessions")
-async def get_conversation_sessions():
-    """Get all conversation sessions (grouped conversations)."""
-    try:
-        history = load_history()
-        
-        # Group by conversation_id
-        sessions = {}
-        for entry in history:
-            conv_id = entry.get("conversation_id", "unknown")
-            if conv_id not in sessions:
-                sessions[conv_id] = {
-                    "conversation_id": conv_id,
-                    "message_count": 0,
-                    "first_message": entry.get("timestamp"),
-                    "last_message": entry.get("timestamp"),
-                    "messages": []
-                }
-            sessions[conv_id]["message_count"] += 1
-            sessions[conv_id]["last_message"] = entry.get("timestamp")
-            sessions[conv_id]["messages"].append(entry)
-        
-        # Convert to list and sort by last message
-        sessions_list = list(sessions.values())
-        sessions_list.sort(key=lambda x: x["last_message"] or "", reverse=True)
-        
-        return {
-            "total_sessions": len(sessions_list),
-            "sessions": sessions_list
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error loading sessions: {str(e)}")
-
 if __name__ == "__main__":
+    import importlib.util
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker only: the agent, current conversation, camera queue and history
+    # index are per-process state. uvloop/httptools come with uvicorn[standard].
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        workers=1,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        access_log=DEBUG
+    )
 
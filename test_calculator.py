@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the CalculatorTool expression evaluator.
+
+Run with: python -m pytest test_calculator.py  (or python test_calculator.py)
+"""
+
+from tools.calculator import CalculatorTool
+
+calc = CalculatorTool()
+
+
+def test_arithmetic():
+    assert calc.calculate("2 + 2") == 4
+    assert calc.calculate("100 / 4") == 25
+    assert calc.calculate("-3 + 2 * (4 - 1)") == 3
+    assert calc.calculate("2 ** -2") == 0.25
+    assert calc.calculate("pow(2, 8)") == 256
+    assert calc.calculate("1 / 0") == "Error: Division by zero"
+
+
+def test_sequence_arguments():
+    assert calc.calculate("sum([1, 2, 3])") == 6
+    assert calc.calculate("max((1, 5, 3))") == 5
+
+
+def test_lists_only_as_function_arguments():
+    # List repetition would allocate without bound
+    for expr in ("[0] * 10 ** 7", "[0] * 10 ** 9", "[1, 2]", "sum([1] * 5)", "abs([1])"):
+        assert str(calc.calculate(expr)).startswith("Error"), expr
+
+
+def test_large_powers_rejected():
+    for expr in ("9 ** 9 ** 9", "(9 ** 9999) ** 9999", "9 ** 9999", "pow(9, 99999999)",
+                 "(2 ** 5000) * (2 ** 5000)"):
+        assert str(calc.calculate(expr)).startswith("Error"), expr
+
+
+def test_results_within_cap_can_be_formatted():
+    result = calc.calculate("2 ** 9999")
+    assert isinstance(result, int)
+    # Must not hit the int-to-str digit limit
+    assert calc.format_result("2 ** 9999", result).startswith("2 ** 9999 = ")
+
+
+def test_disallowed_names():
+    assert calc.calculate('__import__("os")') == "Error: Function '__import__' is not allowed"
+    assert str(calc.calculate("(1).__class__")).startswith("Error")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
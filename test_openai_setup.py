@@ -6,12 +6,10 @@ Run this to check if your OpenAI API key is configured correctly.
 
 import os
 import sys
-from dotenv import load_dotenv
+from utils.env import ensure_env_loaded
 
 # Load .env
-env_path = os.path.join(os.path.dirname(__file__), '.env')
-load_dotenv(dotenv_path=env_path)
-load_dotenv()
+ensure_env_loaded()
 
 print("=" * 60)
 print("OpenAI Setup Verification")
@@ -11,7 +11,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.compat import setup_compatibility
 setup_compatibility()
 
-from dotenv import load_dotenv
+from utils.env import ENV_PATH, ensure_env_loaded
 import google.generativeai as genai
 
 def test_setup():
@@ -23,17 +23,15 @@ def test_setup():
     
     # Test 1: Check .env file
     print("1. Checking .env file...")
-    env_path = os.path.join(os.path.dirname(__file__), '.env')
-    if os.path.exists(env_path):
-        print(f"   ✅ Found .env file at: {env_path}")
+    if os.path.exists(ENV_PATH):
+        print(f"   ✅ Found .env file at: {ENV_PATH}")
     else:
-        print(f"   ❌ .env file not found at: {env_path}")
+        print(f"   ❌ .env file not found at: {ENV_PATH}")
         return False
     
     # Test 2: Load environment variables
     print("\n2. Loading environment variables...")
-    load_dotenv(dotenv_path=env_path)
-    load_dotenv()
+    ensure_env_loaded()
     
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
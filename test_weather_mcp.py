@@ -5,12 +5,10 @@ Quick test script to verify weather MCP setup for Orel agent.
 
 import os
 import sys
-from dotenv import load_dotenv
+from utils.env import ensure_env_loaded
 
 # Load environment variables
-env_path = os.path.join(os.path.dirname(__file__), '.env')
-load_dotenv(dotenv_path=env_path)
-load_dotenv()
+ensure_env_loaded()
 
 print("🧪 Testing Weather MCP Setup for Orel")
 print("=" * 60)
@@ -43,14 +41,15 @@ import shutil
 npx_path = shutil.which("npx")
 if npx_path:
     print(f"✅ npx found: {npx_path}")
-    # Try to get version
-    import subprocess
-    try:
-        result = subprocess.run(["npx", "--version"], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            print(f"   Version: {result.stdout.strip()}")
-    except:
-        pass
+    # Spawning npx costs a Node.js startup, so only ask for its version with --verbose
+    if "--verbose" in sys.argv:
+        import subprocess
+        try:
+            result = subprocess.run([npx_path, "--version"], capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                print(f"   Version: {result.stdout.strip()}")
+        except (OSError, subprocess.SubprocessError):
+            pass
 else:
     print("⚠️  npx not found - install Node.js for stdio weather MCP server")
     print("   Download: https://nodejs.org/")
@@ -5,7 +5,13 @@ This package contains reusable tools that can be used by agents.
 """
 
 from .calculator import CalculatorTool
-from .web_search import WebSearchTool
 
 __all__ = ["CalculatorTool", "WebSearchTool"]
 
+def __getattr__(name):
+    # WebSearchTool pulls in requests/urllib3; import it on first access only (PEP 562)
+    if name == "WebSearchTool":
+        from .web_search import WebSearchTool
+        return WebSearchTool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
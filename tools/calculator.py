@@ -4,79 +4,149 @@ Calculator Tool for Agents
 This module provides a safe calculator tool that can be used by agents.
 """
 
-import re
+import ast
+import math
+import operator
+from functools import lru_cache
 from typing import Union
 
+# Larger exponents (e.g. 9 ** 9 ** 9) would hang the agent
+MAX_EXPONENT = 10000
+# Integer results are capped at this many bits (~3000 digits), so nested powers
+# like (9 ** 9999) ** 9999 are refused up front and every result can be printed
+MAX_RESULT_BITS = 10000
+
+
+def _check_size(value):
+    """Reject integer results too large to compute further or print."""
+    if type(value) is int and value.bit_length() > MAX_RESULT_BITS:
+        raise ValueError(f"Result too large (max {MAX_RESULT_BITS} bits)")
+    return value
+
+
+def _pow(base, exp, mod=None):
+    """pow() that refuses exponents or results large enough to stall the process."""
+    if abs(exp) > MAX_EXPONENT:
+        raise ValueError(f"Exponent too large (max {MAX_EXPONENT})")
+    # Estimate the result size before computing it (mod keeps the result small)
+    if mod is None and type(base) is int and type(exp) is int and exp > 0 and abs(base) > 1:
+        if exp * math.log2(abs(base)) > MAX_RESULT_BITS + 1:
+            raise ValueError(f"Result too large (max {MAX_RESULT_BITS} bits)")
+    return pow(base, exp, mod)
+
+
+# Operators the evaluator understands, keyed by AST node type
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+# Functions that may take a list/tuple literal, e.g. sum([1, 2, 3])
+_SEQUENCE_FUNCTIONS = frozenset({"sum", "min", "max"})
+# Functions callable from expressions
+_ALLOWED_NAMES = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "pow": _pow,
+}
+
+
+@lru_cache(maxsize=256)
+def _parse(expression: str) -> ast.expr:
+    """Parse an expression once; repeated queries reuse the tree."""
+    return ast.parse(expression, mode="eval").body
+
+
 class CalculatorTool:
     """Tool for performing mathematical calculations."""
-    
+
     def __init__(self):
         """Initialize the calculator tool."""
-        # Allowed operations and functions
-        self.allowed_names = {
-            k: v for k, v in __builtins__.items()
-        }
-        self.allowed_names.update({
-            "abs": abs,
-            "round": round,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "pow": pow,
-        })
-    
+        # Shared module-level table; nothing is built per instance
+        self.allowed_names = _ALLOWED_NAMES
+
     def calculate(self, expression: str) -> Union[float, int, str]:
         """
         Safely evaluate a mathematical expression.
-        
+
         Args:
             expression: Mathematical expression as a string
-            
+
         Returns:
             Result of the calculation or error message
         """
         try:
-            # Remove whitespace
-            expression = expression.strip()
-            
-            # Basic validation - only allow numbers, operators, and parentheses
-            if not re.match(r'^[0-9+\-*/().\s]+$', expression):
-                return "Error: Invalid characters in expression. Only numbers and basic operators (+, -, *, /) are allowed."
-            
-            # Evaluate the expression
-            result = eval(expression, {"__builtins__": {}}, self.allowed_names)
-            
-            # Return as integer if it's a whole number
-            if isinstance(result, float) and result.is_integer():
+            # Parse (cached) and walk the tree; only numbers, arithmetic
+            # operators and the allowed functions are evaluated
+            result = self._eval(_parse(expression.strip()))
+
+            # Return as integer if it's a whole number (exact type check: no MRO walk;
+            # is_integer() rather than int() comparison so inf/nan pass through)
+            if type(result) is float and result.is_integer():
                 return int(result)
-            
+
             return result
-            
+
         except ZeroDivisionError:
             return "Error: Division by zero"
         except Exception as e:
             return f"Error: {str(e)}"
-    
+
+    def _eval(self, node: ast.AST) -> Union[float, int]:
+        """Recursively evaluate a whitelisted expression node."""
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return _check_size(_BINARY_OPS[type(node.op)](self._eval(node.left), self._eval(node.right)))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return _UNARY_OPS[type(node.op)](self._eval(node.operand))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in self.allowed_names and not node.keywords):
+            name = node.func.id
+            args = [self._eval_arg(arg, name) for arg in node.args]
+            return _check_size(self.allowed_names[name](*args))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            raise ValueError(f"Function '{node.func.id}' is not allowed")
+        raise ValueError("Invalid expression. Only numbers, arithmetic operators and "
+                         f"{', '.join(self.allowed_names)} are allowed.")
+
+    def _eval_arg(self, node: ast.AST, function: str) -> Union[float, int, list]:
+        """Evaluate a call argument; list/tuple literals are only accepted by sum/min/max."""
+        if isinstance(node, (ast.List, ast.Tuple)) and function in _SEQUENCE_FUNCTIONS:
+            return [self._eval(elt) for elt in node.elts]
+        return self._eval(node)
+
     def format_result(self, expression: str, result: Union[float, int, str]) -> str:
         """Format the calculation result for display."""
         if isinstance(result, str) and result.startswith("Error"):
             return result
-        
+
         return f"{expression} = {result}"
 
 # Example usage
 if __name__ == "__main__":
     calc = CalculatorTool()
-    
+
     test_expressions = [
         "2 + 2",
         "10 * 5",
         "100 / 4",
         "2 ** 8",
+        "pow(2, 8)",
         "sqrt(16)",  # This will fail - sqrt not in allowed functions
     ]
-    
+
     for expr in test_expressions:
         result = calc.calculate(expr)
         print(calc.format_result(expr, result))
-
@@ -5,8 +5,19 @@ This module provides a web search tool that can be used by agents.
 In production, integrate with actual search APIs like Google Search API, SerpAPI, etc.
 """
 
+import asyncio
+import threading
+import time
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional
+from urllib3.util.retry import Retry
+
+SERPAPI_URL = "https://serpapi.com/search"
+# Identical searches within CACHE_TTL seconds are answered from memory
+CACHE_TTL = 300.0
+CACHE_MAX_ENTRIES = 256
 
 class WebSearchTool:
     """Tool for performing web searches."""
@@ -19,6 +30,19 @@ class WebSearchTool:
             api_key: API key for search service (e.g., SerpAPI, Google Custom Search)
         """
         self.api_key = api_key
+        self._session = None
+        # (query, num_results) -> (fetched_at, results), least recently used first
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _get_session(self) -> requests.Session:
+        """Return this tool's pooled session so searches reuse TCP/TLS connections."""
+        if self._session is None:
+            session = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+            session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry))
+            self._session = session
+        return self._session
     
     def search(self, query: str, num_results: int = 5) -> List[Dict[str, str]]:
         """
@@ -31,35 +55,61 @@ class WebSearchTool:
         Returns:
             List of search results with title, url, and snippet
         """
-        # Placeholder implementation
-        # In production, integrate with actual search API
-        
+        # Without an API key, fall back to mock results
         if not self.api_key:
             return self._mock_search(query, num_results)
         
-        # Example: SerpAPI integration
-        # try:
-        #     params = {
-        #         "q": query,
-        #         "api_key": self.api_key,
-        #         "num": num_results
-        #     }
-        #     response = requests.get("https://serpapi.com/search", params=params)
-        #     data = response.json()
-        #     
-        #     results = []
-        #     for item in data.get("organic_results", [])[:num_results]:
-        #         results.append({
-        #             "title": item.get("title", ""),
-        #             "url": item.get("link", ""),
-        #             "snippet": item.get("snippet", "")
-        #         })
-        #     return results
-        # except Exception as e:
-        #     print(f"Search error: {e}")
-        #     return self._mock_search(query, num_results)
+        key = (query, num_results)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < CACHE_TTL:
+                self._cache.move_to_end(key)
+                return cached[1]
+        
+        # SerpAPI integration
+        try:
+            params = {
+                "q": query,
+                "api_key": self.api_key,
+                "num": num_results
+            }
+            response = self._get_session().get(SERPAPI_URL, params=params, timeout=5)
+            response.raise_for_status()
+            data = response.json()
+            
+            results = []
+            for item in data.get("organic_results", [])[:num_results]:
+                results.append({
+                    "title": item.get("title", ""),
+                    "url": item.get("link", ""),
+                    "snippet": item.get("snippet", "")
+                })
+            with self._cache_lock:
+                self._cache[key] = (time.monotonic(), results)
+                self._cache.move_to_end(key)
+                if len(self._cache) > CACHE_MAX_ENTRIES:
+                    self._cache.popitem(last=False)
+            return results
+        except Exception as e:
+            print(f"Search error: {e}")
+            return self._mock_search(query, num_results)
+    
+    async def asearch(self, query: str, num_results: int = 5) -> List[Dict[str, str]]:
+        """Async search(): the blocking HTTP call runs in a worker thread, off the event loop."""
+        return await asyncio.to_thread(self.search, query, num_results)
+    
+    async def search_many(self, queries: List[str], num_results: int = 5) -> List[List[Dict[str, str]]]:
+        """
+        Run several searches concurrently over the shared session.
         
-        return self._mock_search(query, num_results)
+        Args:
+            queries: Search queries
+            num_results: Number of results per query
+            
+        Returns:
+            One result list per query, in the same order
+        """
+        return await asyncio.gather(*(self.asearch(q, num_results) for q in queries))
     
     def _mock_search(self, query: str, num_results: int) -> List[Dict[str, str]]:
         """Mock search results for testing."""
@@ -91,13 +141,15 @@ class WebSearchTool:
         if not results:
             return f"No results found for: {query}"
         
-        summary = f"Search results for '{query}':\n\n"
+        parts = [f"Search results for '{query}':\n\n"]
         for i, result in enumerate(results, 1):
-            summary += f"{i}. {result['title']}\n"
-            summary += f"   URL: {result['url']}\n"
-            summary += f"   {result['snippet']}\n\n"
+            parts.append(
+                f"{i}. {result['title']}\n"
+                f"   URL: {result['url']}\n"
+                f"   {result['snippet']}\n\n"
+            )
         
-        return summary
+        return "".join(parts)
 
 # Example usage
 if __name__ == "__main__":
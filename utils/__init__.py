@@ -3,6 +3,8 @@ Utility modules for Google ADK agents.
 """
 
 from .compat import setup_compatibility
+from .env import ensure_env_loaded
+from .history import HistoryCompactor, compact_history
 
-__all__ = ["setup_compatibility"]
+__all__ = ["setup_compatibility", "ensure_env_loaded", "HistoryCompactor", "compact_history"]
 
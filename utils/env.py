@@ -0,0 +1,25 @@
+"""
+Environment loading for Google ADK agents.
+
+Scripts call ensure_env_loaded() instead of load_dotenv() so the project's
+.env file is read and parsed at most once per process.
+"""
+
+import os
+from functools import lru_cache
+
+# The project .env lives at the repository root
+ENV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env')
+
+@lru_cache(maxsize=1)
+def ensure_env_loaded() -> bool:
+    """
+    Load the project .env into os.environ (once; later calls are no-ops).
+
+    Variables already set in the environment take precedence.
+
+    Returns:
+        True if a .env file was found and loaded
+    """
+    from dotenv import load_dotenv
+    return load_dotenv(dotenv_path=ENV_PATH, override=False)
@@ -0,0 +1,97 @@
+"""
+Chat history compaction for Gemini chat sessions.
+
+Once a chat grows past a message limit, its older turns are replaced by a
+short summary so the per-turn request size stays bounded.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+# Summaries are generated one at a time, off the REPL thread
+_COMPACTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-compactor")
+
+@lru_cache(maxsize=1)
+def _summarizer_model():
+    """Return the shared tool-less model used to summarize old turns."""
+    import google.generativeai as genai
+    return genai.GenerativeModel(model_name=os.getenv("GEMINI_MODEL", "gemini-2.5"))
+
+def history_as_text(messages) -> str:
+    """Render chat contents as a plain-text transcript."""
+    lines = []
+    for msg in messages:
+        for part in msg.parts:
+            if part.function_call:
+                lines.append(f"{msg.role}: [called {part.function_call.name}({dict(part.function_call.args)})]")
+            elif part.function_response:
+                lines.append(f"{msg.role}: [{part.function_response.name} returned {part.function_response.response}]")
+            elif part.text:
+                lines.append(f"{msg.role}: {part.text}")
+    return "\n".join(lines)
+
+def summarize_messages(messages) -> str:
+    """Summarize a slice of chat history into bullet points."""
+    response = _summarizer_model().generate_content(
+        "Summarize the conversation below as concise bullet points for later reference. "
+        "Keep facts, names, numbers and tool results.\n\n" + history_as_text(messages)
+    )
+    return response.text
+
+def _find_cut(history, max_messages: int, keep_messages: int) -> Optional[int]:
+    """Index before which turns should be summarized, or None if no compaction is due."""
+    if len(history) <= max_messages:
+        return None
+    # Cut at a user text turn so function call/response pairs stay together
+    for cut in range(len(history) - keep_messages, len(history)):
+        msg = history[cut]
+        if msg.role == "user" and any(part.text for part in msg.parts):
+            return cut if cut > 0 else None
+    return None
+
+def _splice_summary(chat, cut: int, summary: str):
+    """Replace the chat turns before cut with the summary."""
+    chat.history = [
+        {"role": "user", "parts": [f"Summary of our earlier conversation:\n{summary}"]},
+        {"role": "model", "parts": ["Understood, I'll keep that in mind."]},
+    ] + chat.history[cut:]
+
+def compact_history(chat, max_messages: int, keep_messages: int):
+    """Summarize old turns in place (blocking) if the chat is longer than max_messages."""
+    cut = _find_cut(chat.history, max_messages, keep_messages)
+    if cut is not None:
+        _splice_summary(chat, cut, summarize_messages(chat.history[:cut]))
+
+class HistoryCompactor:
+    """Bound per-turn input size by replacing old chat turns with a summary.
+
+    Summaries are generated on a worker thread and spliced in on a later turn.
+    """
+
+    def __init__(self, max_messages: int, keep_messages: int):
+        self.max_messages = max_messages
+        self.keep_messages = keep_messages
+        self._pending = None  # (cut index, Future[str])
+
+    def maybe_start(self, history):
+        """Start summarizing the oldest turns in the background if the history is too long."""
+        if self._pending is not None:
+            return
+        cut = _find_cut(history, self.max_messages, self.keep_messages)
+        if cut is not None:
+            self._pending = (cut, _COMPACTOR.submit(summarize_messages, history[:cut]))
+
+    def apply(self, chat):
+        """Splice a finished summary into the chat history, if one is ready."""
+        if self._pending is None or not self._pending[1].done():
+            return
+        cut, future = self._pending
+        self._pending = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            print(f"⚠️  Could not summarize conversation history: {str(e)}")
+            return
+        _splice_summary(chat, cut, summary)
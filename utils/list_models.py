@@ -4,11 +4,11 @@ Utility script to list available Gemini models.
 
 import os
 import sys
-from dotenv import load_dotenv
 
 # Setup compatibility
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from utils.compat import setup_compatibility
+from utils.env import ensure_env_loaded
 setup_compatibility()
 
 import google.generativeai as genai
@@ -17,9 +17,7 @@ def list_available_models():
     """List all available Gemini models."""
     
     # Load environment variables
-    env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
-    load_dotenv(dotenv_path=env_path)
-    load_dotenv()
+    ensure_env_loaded()
     
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key or api_key == "your_api_key_here":
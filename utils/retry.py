@@ -7,6 +7,14 @@ import random
 from typing import Callable, Any, Optional
 from functools import wraps
 
+# Substrings (of the lowercased error message) that mark a rate limit/quota error
+_RATE_LIMIT_TOKENS = ("429", "quota", "rate limit", "retry")
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an error is a rate limit/quota error worth retrying."""
+    error_msg = str(error).lower()
+    return any(token in error_msg for token in _RATE_LIMIT_TOKENS)
+
 def retry_with_backoff(
     max_retries: int = 3,
     initial_delay: float = 1.0,
@@ -17,6 +25,9 @@ def retry_with_backoff(
     """
     Decorator to retry a function with exponential backoff.
     
+    Only rate limit/quota errors are retried; any other error, or a rate limit
+    error on the final attempt, is re-raised immediately.
+    
     Args:
         max_retries: Maximum number of retry attempts
         initial_delay: Initial delay in seconds
@@ -28,44 +39,21 @@ def retry_with_backoff(
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             delay = initial_delay
+            sleep, uniform = time.sleep, random.uniform
             
             for attempt in range(max_retries + 1):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    error_msg = str(e).lower()
-                    
-                    # Check if it's a rate limit/quota error
-                    is_rate_limit = (
-                        "429" in str(e) or
-                        "quota" in error_msg or
-                        "rate limit" in error_msg or
-                        "retry" in error_msg
-                    )
-                    
-                    # Only retry on rate limit errors or if it's the last attempt
-                    if not is_rate_limit and attempt < max_retries:
+                    if attempt == max_retries or not _is_retryable(e):
                         raise
-                    
-                    if attempt < max_retries:
-                        # Calculate delay with exponential backoff
-                        if jitter:
-                            # Add random jitter (0 to 1 second)
-                            actual_delay = delay + random.uniform(0, 1)
-                        else:
-                            actual_delay = delay
-                        
-                        actual_delay = min(actual_delay, max_delay)
-                        
-                        print(f"⚠️  Rate limit hit. Retrying in {actual_delay:.1f} seconds... (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(actual_delay)
-                        
-                        # Increase delay for next attempt
-                        delay *= exponential_base
-                    else:
-                        # Last attempt failed
-                        raise
-                        
+                
+                # Exponential backoff, with random jitter (0 to 1 second)
+                actual_delay = min(delay + uniform(0, 1) if jitter else delay, max_delay)
+                print(f"⚠️  Rate limit hit. Retrying in {actual_delay:.1f} seconds... (attempt {attempt + 1}/{max_retries})")
+                sleep(actual_delay)
+                delay *= exponential_base
+
         return wrapper
     return decorator
 